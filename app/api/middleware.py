@@ -0,0 +1,82 @@
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _BodyTooLarge(HTTPException):
+    # An HTTPException, so FastAPI's body parsing raises it as is instead of
+    # turning it into a 400
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body is larger than {max_size} bytes, "
+            "use the resumable upload endpoints for large files",
+        )
+
+
+class MaxBodySizeMiddleware:
+    """Reject requests with a body larger than `max_size` bytes.
+
+    Requests announcing a larger Content-Length are refused before any of
+    the body is read. Bodies without one, e.g. chunked requests, are counted
+    as they are received and cut off with a 413 once they go over, so an
+    oversized upload is never spooled to disk whole.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            try:
+                announced = int(content_length)
+            except ValueError:
+                announced = -1
+            if announced < 0:
+                response = JSONResponse(
+                    content={"error": "Invalid Content-Length header"}, status_code=400
+                )
+                await response(scope, receive, send)
+                return
+            if announced > self.max_size:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise _BodyTooLarge(self.max_size)
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            content={"error": _BodyTooLarge(self.max_size).detail},
+            status_code=413,
+        )
+        await response(scope, receive, send)
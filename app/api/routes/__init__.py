@@ -6,11 +6,13 @@ from app.api.routes import (
     assistant, 
     search, 
     home, 
-    files
+    files,
+    monitoring
 )
 
 api_router = APIRouter()
 api_router.include_router(assistant.router)
 api_router.include_router(home.router)
 api_router.include_router(search.router)
-api_router.include_router(files.router)
\ No newline at end of file
+api_router.include_router(files.router)
+api_router.include_router(monitoring.router)
\ No newline at end of file
@@ -2,11 +2,13 @@ import json
 from typing import Dict, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Form, Body, HTTPException, status
+from fastapi import APIRouter, Depends, Form, Body, HTTPException, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.app import config
 from app.config.mcp import load_config
+from app.db.base import get_db
 from app.repositories.thread import ThreadRepository
 from app.schemas.thread import Thread, ThreadCreate
 
@@ -17,17 +19,18 @@ from typing import Optional, Dict
 from app.repositories.user_config import UserConfigRepository
 
 router = APIRouter()
-user_config_repository = UserConfigRepository()
-thread_repository = ThreadRepository()
     
 @router.post("/assistant/init", response_model=Optional[Thread])
 async def init(
     data: ThreadCreate = Body(...),
+    db: AsyncSession = Depends(get_db),
 ) -> Optional[Thread]:
     """Initialize a new thread with optional user data."""    
+    user_config_repository = UserConfigRepository(db)
+    thread_repository = ThreadRepository(db)
     try:
 
-        user_config = await user_config_repository.get_by_id(data.user_config_id)
+        user_config = await user_config_repository.get_cached(data.user_config_id)
         if not user_config:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User config is not valid"
@@ -53,13 +56,31 @@ async def init(
     "/assistant/chat",
     summary="Receives a message from user along with a thread_id and returns the assistant's response.",
 )
-async def chat(message: str = Form(...), thread_id: str = Form(...)):
+async def chat(
+    message: str = Form(...),
+    thread_id: str = Form(...),
+    db: AsyncSession = Depends(get_db),
+):
+    thread_repository = ThreadRepository(db)
+    user_config_repository = UserConfigRepository(db)
     try:
-        thread = await thread_repository.get_by_id(thread_id)
-    except:
+        thread_uuid = UUID(thread_id)
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found"
         )
+    # Threads and user configs rarely change mid-conversation,
+    # so they are served from the in-process cache
+    thread = await thread_repository.get_cached(thread_uuid)
+    if thread is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found"
+        )
+    user_config = await user_config_repository.get_cached(thread.user_config_id)
+    if user_config is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User config not found"
+        )
 
     mcps = config.get("llm.mcp.servers")
 
@@ -69,7 +90,7 @@ async def chat(message: str = Form(...), thread_id: str = Form(...)):
     for mcp_server in mcps:
         mcp_configs[mcp_server] = all_mcp_configs[mcp_server]
 
-    user_data = {"user_config_id": str(thread.user_config.id)} | thread.user_data | thread.user_config.config
+    user_data = {"user_config_id": str(user_config.id)} | thread.user_data | user_config.config
 
     print("user_data", user_data)
 
@@ -1,73 +1,297 @@
-import json
-import tempfile
+import logging
 import shutil
 from pathlib import Path
-from uuid import UUID
-from typing import Dict, Optional
+from uuid import UUID, uuid4
+from typing import List
 
-from fastapi import APIRouter, File, Form, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Header, Request, UploadFile
 from fastapi.responses import JSONResponse
-from app.core.llamaindex.indexer import index_file_documents
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import get_db
+from app.repositories.document_manifest import DocumentManifestRepository
+from app.repositories.file_chunk import FileChunkRepository
+from app.repositories.ingestion_job import IngestionJobRepository
 from app.repositories.user_config import UserConfigRepository
+from app.schemas.ingestion_job import IngestionJob
+from app.services.ingestion import get_upload_dir
+from app.services.uploads import UploadError, resumable_uploads, save_upload_file
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _error_response(e: UploadError) -> JSONResponse:
+    return JSONResponse(
+        content={"error": str(e), **e.details},
+        status_code=e.status_code
+    )
+
+
+async def _user_config_exists(db: AsyncSession, user_config_id: UUID) -> bool:
+    user_config_repo = UserConfigRepository(db)
+    return await user_config_repo.get_cached(user_config_id) is not None
+
+
+async def _upload_files(
+    files: List[UploadFile], user_config_id: UUID, db: AsyncSession
+) -> JSONResponse:
+    """Stream the files into a new job directory and queue it for indexing."""
+    upload_dir = None
+
+    try:
+        if not await _user_config_exists(db, user_config_id):
+            return JSONResponse(
+                content={"error": "User config not found"},
+                status_code=404
+            )
+
+        job_id = uuid4()
+        upload_dir = get_upload_dir(job_id)
+        for file in files:
+            await save_upload_file(file, upload_dir)
+
+        job = await IngestionJobRepository(db).enqueue(
+            id=job_id,
+            payload={"metadata": {"user_config_id": str(user_config_id)}},
+        )
+        upload_dir = None
+
+        return JSONResponse(
+            content={"message": "Files uploaded and queued for indexing", "job_id": str(job.id)},
+            status_code=202
+        )
+    except UploadError as e:
+        return _error_response(e)
+    except Exception as e:
+        logger.exception("Could not queue the uploaded files")
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=500
+        )
+    finally:
+        # Clean up the upload if the job could not be queued
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+
 @router.post("/files/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    user_config_id: str = Form(None),
+    user_config_id: UUID = Form(...),
+    db: AsyncSession = Depends(get_db),
 ) -> JSONResponse:
     """
-    Upload a file with optional metadata. Index the file and return a JSON response.
-    
+    Upload a file with optional metadata and queue it for indexing.
+
+    The file is indexed by an index worker, follow the job with
+    `GET /files/jobs/{job_id}`.
+
     Args:
         file: The file to upload
         user_config_id: identifier for the user config to use
-    
+
     Returns:
-        JSONResponse with file details and metadata
+        JSONResponse with the id of the ingestion job
     """
+    return await _upload_files([file], user_config_id, db)
 
-    temp_dir = None
-    user_data = None
 
-    try: 
-        # Load user config if provided
-        user_config_repo = UserConfigRepository()
-        user_config = await user_config_repo.get_by_id(
-            config_id=UUID(user_config_id)
-        )
-        if not user_config:
+@router.post("/files/upload/batch")
+async def upload_files(
+    files: List[UploadFile] = File(...),
+    user_config_id: UUID = Form(...),
+    db: AsyncSession = Depends(get_db),
+) -> JSONResponse:
+    """
+    Upload several files and queue them for indexing in a single job.
+
+    Args:
+        files: The files to upload
+        user_config_id: identifier for the user config to use
+
+    Returns:
+        JSONResponse with the id of the ingestion job
+    """
+    return await _upload_files(files, user_config_id, db)
+
+
+@router.post("/files/uploads")
+async def create_upload(
+    filename: str = Form(...),
+    size: int = Form(...),
+    user_config_id: UUID = Form(...),
+    db: AsyncSession = Depends(get_db),
+) -> JSONResponse:
+    """
+    Start a resumable upload, for files too large to send in one request.
+
+    Send the file content in order with `PUT /files/uploads/{upload_id}`,
+    then queue it for indexing with `POST /files/uploads/{upload_id}/complete`.
+    After a dropped connection, `GET /files/uploads/{upload_id}` tells where
+    to resume from.
+
+    Args:
+        filename: Name of the file
+        size: Total size of the file in bytes
+        user_config_id: identifier for the user config to use
+
+    Returns:
+        JSONResponse with the upload id and offset
+    """
+    try:
+        if not await _user_config_exists(db, user_config_id):
             return JSONResponse(
                 content={"error": "User config not found"},
                 status_code=404
             )
+        upload = await resumable_uploads.create(
+            filename=filename,
+            size=size,
+            metadata={"user_config_id": str(user_config_id)},
+        )
+        return JSONResponse(content=upload, status_code=201)
+    except UploadError as e:
+        return _error_response(e)
 
-        temp_dir = tempfile.mkdtemp()            
-        
-        temp_dir_path = Path(temp_dir)
-        temp_file_path = temp_dir_path / file.filename
-        print("temp_file_path", temp_file_path)
-        with open(temp_file_path, "wb") as f:
-            # Read chunks to handle large files
-            for chunk in file.file:
-                f.write(chunk)
 
-        metadata = {"user_config_id": user_config_id}
+@router.get("/files/uploads/{upload_id}")
+async def get_upload(upload_id: UUID) -> JSONResponse:
+    """
+    Get the number of bytes received for a resumable upload.
 
-        await index_file_documents(dir_path=temp_dir_path, metadata=metadata)
+    Args:
+        upload_id: The id returned when the upload was created
+
+    Returns:
+        JSONResponse with the upload size and offset
+    """
+    try:
+        return JSONResponse(content=await resumable_uploads.get(upload_id))
+    except UploadError as e:
+        return _error_response(e)
 
+
+@router.put("/files/uploads/{upload_id}")
+async def append_upload(
+    upload_id: UUID,
+    request: Request,
+    upload_offset: int = Header(...),
+) -> JSONResponse:
+    """
+    Send the next chunk of a resumable upload as the raw request body.
+
+    Args:
+        upload_id: The id returned when the upload was created
+        upload_offset: `Upload-Offset` header, where the chunk starts in the file
+
+    Returns:
+        JSONResponse with the new offset, or 409 with the expected offset
+    """
+    try:
+        upload = await resumable_uploads.append(
+            upload_id, offset=upload_offset, chunks=request.stream()
+        )
+        return JSONResponse(content=upload)
+    except UploadError as e:
+        return _error_response(e)
+
+
+@router.post("/files/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: UUID,
+    db: AsyncSession = Depends(get_db),
+) -> JSONResponse:
+    """
+    Queue a fully received resumable upload for indexing.
+
+    Args:
+        upload_id: The id returned when the upload was created
+
+    Returns:
+        JSONResponse with the id of the ingestion job
+    """
+    job_id = uuid4()
+    upload_dir = get_upload_dir(job_id)
+    try:
+        upload = await resumable_uploads.complete(upload_id, upload_dir)
+        job = await IngestionJobRepository(db).enqueue(
+            id=job_id, payload={"metadata": upload["metadata"]}
+        )
         return JSONResponse(
-            content={"message": "File uploaded and indexed successfully"},
-            status_code=200
+            content={"message": "File uploaded and queued for indexing", "job_id": str(job.id)},
+            status_code=202
         )
+    except UploadError as e:
+        return _error_response(e)
     except Exception as e:
-        print("Error", e)
+        logger.exception(f"Could not queue upload {upload_id}")
+        shutil.rmtree(upload_dir, ignore_errors=True)
         return JSONResponse(
             content={"error": str(e)},
             status_code=500
-        )            
-    finally:
-        # Clean up - remove temp directory and contents
-        if temp_dir:
-            shutil.rmtree(temp_dir)
+        )
+
+
+@router.delete("/files/uploads/{upload_id}")
+async def delete_upload(upload_id: UUID) -> JSONResponse:
+    """
+    Cancel a resumable upload and drop what was received.
+
+    Args:
+        upload_id: The id returned when the upload was created
+    """
+    try:
+        await resumable_uploads.delete(upload_id)
+    except UploadError as e:
+        return _error_response(e)
+    return JSONResponse(content={"message": "Upload deleted"})
+
+
+@router.delete("/files/events/{event_id}")
+async def delete_event(
+    event_id: str,
+    user_config_id: str,
+    db: AsyncSession = Depends(get_db),
+) -> JSONResponse:
+    """
+    Delete everything indexed for an event, by dropping its partition.
+
+    Args:
+        event_id: The event to delete
+        user_config_id: identifier for the user config the event was indexed with
+    """
+    # Commits on its own, before this session touches anything
+    chunks = await FileChunkRepository(db).drop_event(
+        tenant_id=user_config_id, event_id=event_id
+    )
+    files = await DocumentManifestRepository(db).delete_files(
+        user_config_id=user_config_id, event_id=event_id
+    )
+    await db.commit()
+    if not chunks and not files:
+        return JSONResponse(
+            content={"error": "Event not found"},
+            status_code=404
+        )
+    return JSONResponse(content={"message": "Event deleted"})
+
+
+@router.get("/files/jobs/{job_id}", response_model=IngestionJob)
+async def get_job(job_id: UUID, db: AsyncSession = Depends(get_db)):
+    """
+    Get the status, stage and progress of an ingestion job.
+
+    Args:
+        job_id: The id returned by the upload
+
+    Returns:
+        The ingestion job, with its error if it failed
+    """
+    job = await IngestionJobRepository(db).get(job_id)
+    if job is None:
+        return JSONResponse(
+            content={"error": "Job not found"},
+            status_code=404
+        )
+    return IngestionJob.model_validate(job)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from app.db.base import get_pool_stats
+from app.repositories.thread import thread_cache
+from app.repositories.user_config import user_config_cache
+from app.services.agent_memory import agent_memory
+from app.services.embedding_cache import query_embedding_cache
+from app.services.mcp_pool import mcp_pool
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get(
+    "/monitoring/stats",
+    summary="Get usage statistics of the process-wide pools and caches",
+)
+async def stats():
+    return {
+        "mcp": mcp_pool.stats(),
+        "agent_memory": agent_memory.stats(),
+        "database": get_pool_stats(),
+        "cache": {
+            thread_cache.name: thread_cache.stats(),
+            user_config_cache.name: user_config_cache.stats(),
+            "query_embeddings": query_embedding_cache.stats(),
+        },
+    }
@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 
 from fastapi import APIRouter
-from pydantic import BaseModel
-from app.services.vector_store import VectorStoreService
+from pydantic import BaseModel, Field
+from llama_index.core.schema import NodeWithScore
+from app.repositories.user_config import UserConfigRepository
+from app.services.vector_store import SearchSettings, get_vector_store_service
 
 
 router = APIRouter(tags=["search"])
@@ -10,27 +13,85 @@ router = APIRouter(tags=["search"])
 
 class SearchQuery(BaseModel):
     query: str
-    limit: int = 5
+    limit: int = Field(default=5, ge=1, le=100)
+    user_config_id: Optional[UUID] = None
+    event_id: Optional[str] = None
+    min_score: Optional[float] = None
+    # HNSW candidate list, trades latency for recall on this request only
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+
+    def metadata(self) -> dict:
+        """Metadata filters requested by the query."""
+        return {
+            key: value
+            for key, value in {
+                "user_config_id": (
+                    str(self.user_config_id) if self.user_config_id is not None else None
+                ),
+                "event_id": self.event_id,
+            }.items()
+            if value is not None
+        }
 
 
 class SearchResult(BaseModel):
     content: str
     metadata: dict
+    # Cosine similarity (0-1), or with hybrid search the reciprocal rank
+    # fusion score, which is much smaller and not comparable to min_score
     score: float
 
 
-@router.post("/search", response_model=List[SearchResult])
-async def search(query: SearchQuery) -> List[SearchResult]:
-    """Search documents using vector similarity."""
-    vector_store = VectorStoreService()
-    index = vector_store.get_index()
-    query_engine = index.as_query_engine()
-    response = await query_engine.aquery(query.query)
+class SearchAnswer(BaseModel):
+    answer: str
+    sources: List[SearchResult]
+
+
+async def _search_settings(query: SearchQuery) -> SearchSettings:
+    """Search settings of the query's user config, or the app defaults."""
+    user_config = None
+    if query.user_config_id is not None:
+        user_config = await UserConfigRepository().get_cached(query.user_config_id)
+    overrides = dict(user_config.config.get("search") or {}) if user_config else {}
+    if query.ef_search is not None:
+        overrides["ef_search"] = query.ef_search
+    return SearchSettings.for_tenant(overrides)
+
+
+def _to_results(nodes: List[NodeWithScore]) -> List[SearchResult]:
     return [
         SearchResult(
             content=node.node.text,
             metadata=node.node.metadata,
             score=node.score,
         )
-        for node in response.source_nodes
+        for node in nodes
     ]
+
+
+@router.post("/search", response_model=List[SearchResult])
+async def search(query: SearchQuery) -> List[SearchResult]:
+    """Search documents using vector similarity, fused with full-text search if enabled."""
+    nodes = await get_vector_store_service().aretrieve(
+        query.query,
+        top_k=query.limit,
+        metadata=query.metadata(),
+        min_score=query.min_score,
+        settings=await _search_settings(query),
+    )
+    return _to_results(nodes)
+
+
+@router.post("/search/answer", response_model=SearchAnswer)
+async def search_answer(query: SearchQuery) -> SearchAnswer:
+    """Search documents and synthesize an answer from them with the LLM."""
+    query_engine = get_vector_store_service().get_query_engine(
+        top_k=query.limit,
+        metadata=query.metadata(),
+        settings=await _search_settings(query),
+    )
+    response = await query_engine.aquery(query.query)
+    sources = response.source_nodes
+    if query.min_score is not None:
+        sources = [node for node in sources if (node.score or 0.0) >= query.min_score]
+    return SearchAnswer(answer=str(response), sources=_to_results(sources))
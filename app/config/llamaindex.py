@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 from llama_index.core.multi_modal_llms import MultiModalLLM
 from llama_index.core.settings import Settings
@@ -15,14 +15,44 @@ def get_multi_modal_llm():
     return _multi_modal_llm
 
 
+_initialized = False
+
+
 def init_settings():
-    """Initialize LlamaIndex settings based on environment."""
+    """Initialize LlamaIndex settings based on environment.
+
+    The LLM and embedding clients are created once per process.
+    """
+    global _initialized
+    if _initialized:
+        return
     model_provider = config.get("llm.provider")
     match model_provider:
         case "openai":
             init_openai()
         case "ollama":
             init_ollama()
+        case "fake":
+            init_fake()
+    _initialized = True
+
+
+def get_embedding_batch_config() -> Tuple[int, int]:
+    """Get the batch size and max in-flight batches of the configured embedding provider."""
+    model_provider = config.get("llm.provider")
+    return (
+        int(config.get(f"llm.{model_provider}.embedding_batch_size")),
+        int(config.get(f"llm.{model_provider}.embedding_max_in_flight")),
+    )
+
+
+def get_embedding_model_info() -> Tuple[str, int]:
+    """Get the name and dimension of the configured embedding model."""
+    model_provider = config.get("llm.provider")
+    return (
+        config.get(f"llm.{model_provider}.embedding_model"),
+        int(config.get("llamaindex.embedding.dimension")),
+    )
 
 
 def init_ollama():
@@ -35,11 +65,21 @@ def init_ollama():
             "Ollama support is not installed. Please install it with `poetry add llama-index-llms-ollama` and `poetry add llama-index-embeddings-ollama`"
         )
 
+    from app.core.llamaindex.truncated_embedding import TruncatedEmbedding
+
     base_url = config.get("llm.ollama.host")
     request_timeout = float(config.get("llm.ollama.request_timeout"))
-    Settings.embed_model = OllamaEmbedding(
-        base_url=base_url,
+    embed_batch_size = config.get("llm.ollama.embedding_batch_size")
+    # Ollama has no dimensions parameter, embeddings are truncated here
+    Settings.embed_model = TruncatedEmbedding(
+        embed_model=OllamaEmbedding(
+            base_url=base_url,
+            model_name=config.get("llm.ollama.embedding_model"),
+            embed_batch_size=embed_batch_size,
+        ),
+        dimension=config.get("llamaindex.embedding.dimension"),
         model_name=config.get("llm.ollama.embedding_model"),
+        embed_batch_size=embed_batch_size,
     )
     Settings.llm = Ollama(
         base_url=base_url,
@@ -48,6 +88,19 @@ def init_ollama():
     )
 
 
+def init_fake():
+    """Initialize deterministic embeddings and a mock LLM, for local runs without a provider."""
+    from llama_index.core.llms import MockLLM
+
+    from app.core.llamaindex.hash_embedding import HashEmbedding
+
+    Settings.embed_model = HashEmbedding(
+        dimension=config.get("llamaindex.embedding.dimension"),
+        embed_batch_size=config.get("llm.fake.embedding_batch_size"),
+    )
+    Settings.llm = MockLLM()
+
+
 def init_openai():
     """Initialize OpenAI settings."""
     from llama_index.core.constants import DEFAULT_TEMPERATURE
@@ -68,8 +121,9 @@ def init_openai():
         global _multi_modal_llm
         _multi_modal_llm = OpenAIMultiModal(model=model_name)
 
-    dimensions = config.get("llm.openai.embedding_dimension")
+    # text-embedding-3 models truncate to `dimensions` and normalize server side
     Settings.embed_model = OpenAIEmbedding(
         model=config.get("llm.openai.embedding_model"),
-        dimensions=int(dimensions) if dimensions is not None else None,
+        dimensions=config.get("llamaindex.embedding.dimension"),
+        embed_batch_size=config.get("llm.openai.embedding_batch_size"),
     )
@@ -1,10 +1,9 @@
-import os
 import json
 
 from datetime import datetime
 
-from psycopg import AsyncConnection
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.graph.state import CompiledStateGraph
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt.tool_node import tools_condition
@@ -23,19 +22,26 @@ from langgraph.utils.runnable import RunnableCallable
 
 from langchain_core.runnables import RunnableConfig
 
-from typing import cast
+from typing import Dict, cast
 from typing_extensions import Sequence
 from langchain_core.messages import BaseMessage
 
 from langgraph.errors import ErrorCode, create_error_message
 
-from app.config.app import config as app_config
-
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from app.services.agent_memory import agent_memory
+from app.services.mcp_pool import mcp_pool
 
 from app.core.agents import prompts
 
 
+# Compiled graphs by (agent class, prompt, MCP server set), shared by requests
+_graphs: Dict[tuple, CompiledStateGraph] = {}
+
+
+def _current_datetime() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
 class BaseAgent(ABC):
 
     PROMPT_NAME = "v1"
@@ -52,8 +58,14 @@ class BaseAgent(ABC):
 
         Args:
             thread_id: (any) an identifier used to keep track of a conversation.
-            mcp_filename: (str) the filename of the MCP server.
-            tools_metadata: (dict) this dict contains metadata for some tools.
+            prompt: (str) the system prompt of the assistant.
+            mcps: (dict) the configs of the MCP servers, by server name.
+            user_data: (dict) data passed to every tool call of this conversation.
+
+        The compiled graph is cached per (agent class, prompt, MCP server set)
+        and keeps a reference to the agent that built it, so graph nodes must
+        only use values that are part of that key. Per-request values such
+        as the thread id and user data travel in the RunnableConfig.
         """
         self._thread_id = thread_id
         self._prompt = prompt
@@ -68,7 +80,6 @@ class BaseAgent(ABC):
 
         self._tools = None
         self._model_runnable = None
-        self._graph = None
 
     @abstractmethod
     def _get_chat_model(self):
@@ -82,7 +93,8 @@ class BaseAgent(ABC):
             ]
         ).partial(
             tools=[tool_name for tool_name, _ in self._tools_metadata.items()],
-            current_datetime=datetime.now().strftime("%Y-%m-%d %H:%M"),
+            # Evaluated each time the prompt is formatted
+            current_datetime=_current_datetime,
         )
         llm = self._get_chat_model()
         return assistant_prompt | llm.bind_tools(self._tools)
@@ -172,9 +184,9 @@ class BaseAgent(ABC):
         response.name = self.__class__.__name__
         return {"messages": response}
 
-    async def _create_graph(self, checkpointer: AsyncPostgresSaver):
+    def _create_graph(self, checkpointer: AsyncPostgresSaver) -> CompiledStateGraph:
         """
-        Set the graph builder, initializes the memory saver and returns a compiled StateGraph
+        Set the graph builder and returns a StateGraph compiled with the given checkpointer
 
         Returns:
             Compiled StateGraph
@@ -189,7 +201,6 @@ class BaseAgent(ABC):
             ValidatedToolNode(
                 self._tools, 
                 tools_metadata=self._tools_metadata,
-                user_data=self._user_data
             )
         )
         graph_builder.add_node(
@@ -205,31 +216,23 @@ class BaseAgent(ABC):
         graph_builder.add_edge("tools", "direct_tool_output")
         graph_builder.add_edge("direct_tool_output", "assistant")
 
-        await checkpointer.setup()
-
         graph = graph_builder.compile(checkpointer=checkpointer)
 
         return graph
 
-    async def _initialize(self):
-        connection_kwargs = {"autocommit": True}
-        connection_string = os.getenv("MEMORY_ASYNC_DATABASE_URL", None)
-        if not connection_string:
-            raise Exception(
-                "No connection string set for agent memory. Please add MEMORY_ASYNC_DATABASE_URL to .env"
-            )
-        async with AsyncPostgresSaver.from_conn_string(
-            connection_string
-        ) as checkpointer:
-            async with await AsyncConnection.connect(
-                connection_string, **connection_kwargs
-            ) as conn:
-                checkpointer = AsyncPostgresSaver(conn)
-                self._graph = await self._create_graph(checkpointer)
-
-    async def _stream(self, config: dict, input: dict = None):
-
-        async for event, meta in self._graph.astream(
+    async def _get_graph(self) -> CompiledStateGraph:
+        """Get the compiled graph of this agent, building it on first use."""
+        key = (self.__class__, self._prompt, frozenset(self._mcps))
+        if key not in _graphs:
+            self._tools = await mcp_pool.get_tools(self._mcps.keys())
+            self._model_runnable = self._get_assistant_runnable()
+            checkpointer = await agent_memory.get_checkpointer()
+            _graphs.setdefault(key, self._create_graph(checkpointer))
+        return _graphs[key]
+
+    async def _stream(self, graph: CompiledStateGraph, config: dict, input: dict = None):
+
+        async for event, meta in graph.astream(
             input, config=config, stream_mode="messages"
         ):
             event.pretty_print()
@@ -255,61 +258,50 @@ class BaseAgent(ABC):
     async def stream(self, user_input: str):
         """Stream the agent's response to user input"""
 
-        async with MultiServerMCPClient(self._mcps) as client:
-            self._tools = client.get_tools()
-            self._model_runnable = self._get_assistant_runnable()
+        graph = await self._get_graph()
 
-            connection_kwargs = {"autocommit": True}
-            connection_string = app_config.get("llm.memory.async_database_url")
-            if not connection_string:
-                raise Exception(
-                    "No connection string set for agent memory. Please add MEMORY_ASYNC_DATABASE_URL to .env"
-                )
-            async with AsyncPostgresSaver.from_conn_string(
-                connection_string
-            ) as checkpointer:
-                async with await AsyncConnection.connect(
-                    connection_string, **connection_kwargs
-                ) as conn:
-                    checkpointer = AsyncPostgresSaver(conn)
-                    self._graph = await self._create_graph(checkpointer)
-
-                    config = {"configurable": {"thread_id": self._thread_id}}
-
-                    snapshot = await self._graph.aget_state(config)
-
-                    # Check if previous interaction interrupted before tool calling
-                    if snapshot.next and hasattr(
-                        snapshot.values["messages"][-1], "tool_calls"
-                    ):
+        async with mcp_pool.acquire(self._mcps.keys()):
+            config = {
+                "configurable": {
+                    "thread_id": self._thread_id,
+                    "user_data": self._user_data,
+                }
+            }
 
-                        for tool_call in snapshot.values["messages"][-1].tool_calls:
-                            tool_name = tool_call["name"]
-                            tool_metadata = self._tools_metadata[tool_name]
+            snapshot = await graph.aget_state(config)
 
-                            print("tool_metadata", tool_metadata)
+            # Check if previous interaction interrupted before tool calling
+            if snapshot.next and hasattr(
+                snapshot.values["messages"][-1], "tool_calls"
+            ):
 
-                            if not tool_metadata["interrupt"]:
-                                continue
+                for tool_call in snapshot.values["messages"][-1].tool_calls:
+                    tool_name = tool_call["name"]
+                    tool_metadata = self._tools_metadata[tool_name]
 
-                            resume = (
-                                user_input.strip()
-                                == tool_metadata["interrupt"]["continue"]
-                            )
+                    print("tool_metadata", tool_metadata)
 
-                            async for content in self._stream(
-                                config, Command(resume=resume)
-                            ):
-                                yield content
-                    else:
-                        async for content in self._stream(
-                            config, {"messages": ("user", user_input)}
-                        ):
-                            yield content
+                    if not tool_metadata["interrupt"]:
+                        continue
 
-                    snapshot = await self._graph.aget_state(config)
+                    resume = (
+                        user_input.strip()
+                        == tool_metadata["interrupt"]["continue"]
+                    )
 
-                    # # Check if graph interrupted after processing user input.
-                    if snapshot.next:
-                        for task in snapshot.tasks:
-                            yield json.dumps(task.interrupts[-1].value)
+                    async for content in self._stream(
+                        graph, config, Command(resume=resume)
+                    ):
+                        yield content
+            else:
+                async for content in self._stream(
+                    graph, config, {"messages": ("user", user_input)}
+                ):
+                    yield content
+
+            snapshot = await graph.aget_state(config)
+
+            # # Check if graph interrupted after processing user input.
+            if snapshot.next:
+                for task in snapshot.tasks:
+                    yield json.dumps(task.interrupts[-1].value)
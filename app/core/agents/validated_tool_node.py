@@ -37,6 +37,13 @@ def msg_content_output(output: Any) -> Union[str, list[dict]]:
 
 
 class ValidatedToolNode(ToolNode):
+    """ToolNode that validates required args, asks for approval on tools marked
+    with `interrupt` and injects the conversation's `user_data` into every call.
+
+    The node is shared by every request using the same compiled graph, so
+    `user_data` is read from `config["configurable"]["user_data"]`; the
+    constructor argument is only a fallback.
+    """
 
     def __init__(
         self,
@@ -51,7 +58,6 @@ class ValidatedToolNode(ToolNode):
         tools_metadata: Optional[dict] = None,
         user_data: Optional[dict] = None
     ) -> None:
-        self._validated = {}
         self._tools_metadata = tools_metadata
         self._user_data = user_data
         super().__init__(
@@ -64,11 +70,6 @@ class ValidatedToolNode(ToolNode):
 
     def _validate_tool_call(self, call: ToolCall) -> Optional[ToolMessage]:
 
-        if call["id"] in self._validated:
-            return None
-
-        self._validated[call["id"]] = True
-
         if (requested_tool := call["name"]) not in self.tools_by_name:
             content = INVALID_TOOL_NAME_ERROR_TEMPLATE.format(
                 requested_tool=requested_tool,
@@ -127,6 +128,11 @@ class ValidatedToolNode(ToolNode):
 
         return None
 
+    def _inject_user_data(self, call: ToolCall, config: RunnableConfig) -> None:
+        user_data = config.get("configurable", {}).get("user_data", self._user_data)
+        if user_data:
+            call["args"]["user_data"] = user_data
+
     async def _arun_one(
         self,
         call: ToolCall,
@@ -139,9 +145,8 @@ class ValidatedToolNode(ToolNode):
 
         if interrupt_message := self._check_interrupt(call):
             return interrupt_message
-        
-        if self._user_data:
-            call["args"]["user_data"] = self._user_data 
+
+        self._inject_user_data(call, config)
 
         return await super()._arun_one(call, input_type, config)
 
@@ -158,4 +163,6 @@ class ValidatedToolNode(ToolNode):
         if interrupt_message := self._check_interrupt(call):
             return interrupt_message
 
+        self._inject_user_data(call, config)
+
         return super()._run_one(call, input_type, config)
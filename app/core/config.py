@@ -14,9 +14,11 @@ class Settings(BaseSettings):
     LLM_MCP_SERVERS: str | None = None
     LLM_OLLAMA_EMBEDDING_MODEL: str | None = None
     LLM_OLLAMA_EMBEDDING_DIMENSION: str | None = None
+    EMBEDDING_DIMENSION: str | None = None
 
     # OpenAI settings
     OPENAI_API_KEY: str | None = None
+    LLM_OPENAI_EMBEDDING_DIMENSION: str | None = None
 
     # LlamaIndex settings
     LLAMA_INDEX_DATA_TABLE: str | None = None
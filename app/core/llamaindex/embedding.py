@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.settings import Settings
+from llama_index.core.utils import get_tokenizer
+
+from app.config.app import config
+from app.config.llamaindex import get_embedding_batch_config, get_embedding_model_info
+from app.repositories.embedding_cache import EmbeddingCacheRepository
+from app.services.embedding_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingStats:
+    """Embedding cache usage and throughput of an indexing run."""
+
+    hits: int = 0
+    misses: int = 0
+    # Texts sent to the embedding model, their tokens and the time it took
+    embedded: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+    retries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.embedded / self.seconds if self.seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+    def __add__(self, other: "EmbeddingStats") -> "EmbeddingStats":
+        return EmbeddingStats(
+            self.hits + other.hits,
+            self.misses + other.misses,
+            self.embedded + other.embedded,
+            self.tokens + other.tokens,
+            self.seconds + other.seconds,
+            self.retries + other.retries,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate), "
+            f"{self.chunks_per_second:.1f} chunks/s, {self.tokens_per_second:.0f} tokens/s, "
+            f"{self.retries} retries"
+        )
+
+
+def _is_rate_limit(e: Exception) -> bool:
+    status_code = getattr(e, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(e, "response", None), "status_code", None)
+    return status_code == 429
+
+
+class _AdaptiveLimiter:
+    """Bound the embedding batches in flight, backing off on rate limits.
+
+    The limit is halved when the provider answers 429 and grows back by one
+    after every `max_in_flight` successful batches, up to `max_in_flight`.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = self.max_in_flight
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def __aexit__(self, *exc) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def success(self) -> None:
+        async with self._condition:
+            self._successes += 1
+            if self.limit < self.max_in_flight and self._successes >= self.max_in_flight:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    async def rate_limited(self) -> None:
+        async with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+
+async def embed_texts(
+    texts: List[str],
+    embed_model: Optional[BaseEmbedding] = None,
+    stats: Optional[EmbeddingStats] = None,
+) -> List[List[float]]:
+    """
+    Embed texts in concurrent batches sized for the configured provider.
+
+    Failed batches are retried with exponential backoff and jitter. Rate
+    limit errors also lower the number of batches in flight, so the run
+    settles just under the provider's limits.
+
+    Args:
+        texts: the texts to embed
+        embed_model: the model to use, defaults to Settings.embed_model
+        stats: updated with the tokens sent, time spent and retries
+
+    Returns:
+        The embeddings, in the order of the texts
+    """
+    embed_model = embed_model or Settings.embed_model
+    stats = stats if stats is not None else EmbeddingStats()
+    batch_size, max_in_flight = get_embedding_batch_config()
+    max_retries = config.get("llamaindex.embedding.max_retries")
+    backoff_base = config.get("llamaindex.embedding.backoff_base")
+    backoff_max = config.get("llamaindex.embedding.backoff_max")
+    limiter = _AdaptiveLimiter(max_in_flight)
+
+    tokenizer = get_tokenizer()
+    stats.embedded += len(texts)
+    stats.tokens += await asyncio.to_thread(
+        lambda: sum(len(tokenizer(text)) for text in texts)
+    )
+
+    async def embed_batch(batch: List[str]) -> List[List[float]]:
+        for attempt in range(max_retries + 1):
+            try:
+                async with limiter:
+                    embeddings = await embed_model.aget_text_embedding_batch(batch)
+                await limiter.success()
+                return embeddings
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                if _is_rate_limit(e):
+                    await limiter.rate_limited()
+                delay = min(backoff_max, backoff_base * 2**attempt)
+                delay = random.uniform(delay / 2, delay)
+                stats.retries += 1
+                logger.warning(
+                    f"Embedding batch failed ({e}), retrying in {delay:.1f}s "
+                    f"with {limiter.limit} batches in flight"
+                )
+                await asyncio.sleep(delay)
+
+    start = time.perf_counter()
+    batches = await asyncio.gather(
+        *[
+            embed_batch(texts[i : i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+    )
+    stats.seconds += time.perf_counter() - start
+    return [embedding for batch in batches for embedding in batch]
+
+
+async def embed_nodes(
+    nodes: Sequence[BaseNode], embed_model: Optional[BaseEmbedding] = None
+) -> EmbeddingStats:
+    """
+    Set the embedding of every node, only calling the embedding model on cache misses.
+
+    Embeddings are cached by (sha256 of the embedded text, model, dimension),
+    so chunks that did not change since a previous upload reuse their
+    embedding. Identical chunks within the batch are embedded once.
+
+    Args:
+        nodes: the nodes to embed, updated in place
+        embed_model: the model used on cache misses, defaults to Settings.embed_model
+
+    Returns:
+        The cache hits and misses of this batch, and the embedding throughput
+    """
+    model, dimension = get_embedding_model_info()
+    repository = EmbeddingCacheRepository()
+
+    texts = {
+        node.node_id: node.get_content(metadata_mode=MetadataMode.EMBED)
+        for node in nodes
+    }
+    hashes = {node_id: content_hash(text) for node_id, text in texts.items()}
+
+    embeddings: Dict[str, List[float]] = await repository.get_many(
+        kind="text",
+        model=model,
+        dimension=dimension,
+        content_hashes=list(set(hashes.values())),
+    )
+    stats = EmbeddingStats(hits=sum(1 for h in hashes.values() if h in embeddings))
+
+    missing = {
+        hashes[node_id]: text
+        for node_id, text in texts.items()
+        if hashes[node_id] not in embeddings
+    }
+    stats.misses = len(nodes) - stats.hits
+    if missing:
+        new_embeddings = await embed_texts(
+            list(missing.values()), embed_model=embed_model, stats=stats
+        )
+        new_embeddings = dict(zip(missing.keys(), new_embeddings))
+        await repository.put_many(
+            kind="text", model=model, dimension=dimension, embeddings=new_embeddings
+        )
+        embeddings.update(new_embeddings)
+
+    for node in nodes:
+        node.embedding = embeddings[hashes[node.node_id]]
+
+    logger.info(f"Embedded {len(nodes)} nodes: {stats}")
+    return stats
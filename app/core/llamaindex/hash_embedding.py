@@ -0,0 +1,47 @@
+import hashlib
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import Field
+
+
+@lru_cache(maxsize=100_000)
+def _token_vector(token: str, dimension: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(token.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic embedding model that needs no provider, for local runs and evaluations.
+
+    A text embeds to the normalized sum of a pseudo-random vector per
+    lowercased word, seeded by the word's hash. Texts sharing words are
+    similar, so nearest-neighbour search behaves like it does on real
+    embeddings, and the same text always gets the same vector.
+    """
+
+    dimension: int = Field(default=768, gt=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in text.lower().split():
+            vector += _token_vector(token, self.dimension)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
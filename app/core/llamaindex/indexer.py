@@ -1,68 +1,311 @@
-from app.config.app import config
-from sqlalchemy import make_url
-from llama_index.core import StorageContext
-from llama_index.vector_stores.postgres import PGVectorStore
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
 
-from app.db.base import get_database_url
+from llama_index.core import Document
+from llama_index.core.ingestion import arun_transformations
+from llama_index.core.schema import BaseNode
+from llama_index.core.settings import Settings
+from llama_index.vector_stores.postgres import PGVectorStore
 
-from app.core.llamaindex.loaders import load_documents_from_dir
-from app.core.llamaindex.loaders.file import get_file_document
+from app.core.llamaindex.embedding import EmbeddingStats, embed_nodes
+from app.core.llamaindex.loaders import iter_documents_from_files
+from app.core.llamaindex.loaders.file import get_file_document, list_files
+from app.config.app import config
 from app.config.llamaindex import init_settings
+from app.db.base import get_session_factory
+
+from app.repositories.document_manifest import DocumentManifestRepository
+from app.repositories.file_chunk import FileChunkRepository, partition_keys
+from app.schemas.document_manifest import DocumentManifestCreate
+from app.services.vector_store import get_vector_store_service
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys that identify the source file but carry no meaning for search
+_FILE_METADATA_KEYS = ["file_path", "file_id"]
+
+# Called with the stage of an indexing run and its overall progress, between 0 and 1
+ProgressCallback = Callable[[str, float], Awaitable[None]]
+
+
+@dataclass
+class IndexingReport:
+    """What an indexing run changed, by file id."""
+
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    chunks: int = 0
+    embeddings: EmbeddingStats = field(default_factory=EmbeddingStats)
+    # Parse time of every indexed file, in seconds
+    parse_seconds: Dict[str, float] = field(default_factory=dict)
 
-from llama_index.core.indices import VectorStoreIndex
-
-from app.repositories.file_chunk import FileChunkRepository
-
-def get_vector_store():
-    """Get or create the vector store instance."""
-    embed_dim = 768
-    table_name = config.get("llamaindex.data_table")
-
-    url = make_url(get_database_url())
-
-    return PGVectorStore.from_params(
-        database=url.database,
-        host=url.host,
-        password=url.password,
-        port=str(url.port) if url.port else None,
-        user=url.username,
-        table_name=table_name,
-        embed_dim=embed_dim,
-        hnsw_kwargs={
-            "hnsw_m": 16,
-            "hnsw_ef_construction": 64,
-            "hnsw_ef_search": 40,
-            "hnsw_dist_method": "vector_cosine_ops",
-        },
+    def slowest_files(self, n: int = 10) -> List[tuple[str, float]]:
+        return sorted(self.parse_seconds.items(), key=lambda item: -item[1])[:n]
+
+    def to_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "chunks": self.chunks,
+            "embedding_cache": {
+                "hits": self.embeddings.hits,
+                "misses": self.embeddings.misses,
+            },
+            "embedding_throughput": {
+                "chunks_per_second": round(self.embeddings.chunks_per_second, 1),
+                "tokens_per_second": round(self.embeddings.tokens_per_second, 1),
+                "retries": self.embeddings.retries,
+            },
+            "parse_seconds": round(sum(self.parse_seconds.values()), 2),
+            "slowest_files": [
+                {"file_id": file_id, "seconds": round(seconds, 2)}
+                for file_id, seconds in self.slowest_files()
+            ],
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.updated)} updated, "
+            f"{len(self.removed)} removed, {len(self.unchanged)} unchanged files; "
+            f"{self.chunks} chunks indexed in {sum(self.parse_seconds.values()):.1f}s of parsing; "
+            f"embeddings: {self.embeddings}"
+        )
+
+
+def get_vector_store() -> PGVectorStore:
+    """Get the process-wide vector store instance."""
+    return get_vector_store_service().vector_store
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _hash_files(dir_path: str) -> Dict[str, tuple[Path, str]]:
+    """Get the path and content hash of every file of a directory, by file id."""
+    return {
+        Path(os.path.relpath(path, dir_path)).as_posix(): (path, _hash_file(path))
+        for path in list_files(dir_path)
+    }
+
+async def _split_and_embed(
+    documents: List[Document],
+) -> tuple[Sequence[BaseNode], EmbeddingStats]:
+    """Split the documents into chunks and embed them."""
+    for doc in documents:
+        # The file path is a temp dir for uploads, keeping it out of the
+        # embedded text lets re-uploads of the same content hit the cache
+        for key in _FILE_METADATA_KEYS:
+            if key not in doc.excluded_embed_metadata_keys:
+                doc.excluded_embed_metadata_keys.append(key)
+            if key not in doc.excluded_llm_metadata_keys:
+                doc.excluded_llm_metadata_keys.append(key)
+
+    nodes = await arun_transformations(
+        documents, Settings.transformations, show_progress=True
     )
+    stats = await embed_nodes(nodes)
+    return nodes, stats
+
+async def _write_window(
+    nodes: Sequence[BaseNode],
+    file_ids: List[str],
+    files: Dict[str, tuple[Path, str]],
+    scope: Optional[Dict[str, str]],
+) -> None:
+    """
+    Replace the chunks of some files in one transaction.
 
-async def index_file_documents(dir_path: str, metadata: dict = {}):
+    Each file's old chunks disappear in the same commit that makes its new
+    chunks searchable, so a file is never missing from search while it is
+    re-indexed.
+    """
+    session_factory = await get_session_factory()
+    async with session_factory() as session:
+        async with session.begin():
+            file_chunk_repository = FileChunkRepository(session)
+            if scope is not None:
+                await file_chunk_repository.delete_by_files(
+                    metadata=scope, file_ids=file_ids
+                )
+            await file_chunk_repository.add_nodes(nodes)
+
+            if scope is not None:
+                chunks_per_file: Dict[str, int] = {}
+                for node in nodes:
+                    file_id = node.metadata["file_id"]
+                    chunks_per_file[file_id] = chunks_per_file.get(file_id, 0) + 1
+                await DocumentManifestRepository(session).upsert_many(
+                    entries=[
+                        DocumentManifestCreate(
+                            user_config_id=scope.get("user_config_id", ""),
+                            event_id=scope["event_id"],
+                            file_id=file_id,
+                            content_hash=files[file_id][1],
+                            chunks=chunks_per_file.get(file_id, 0),
+                        )
+                        for file_id in file_ids
+                    ]
+                )
+
+async def index_file_documents(
+    dir_path: str,
+    metadata: dict = {},
+    incremental: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> IndexingReport:
+    """
+    Index every document of a directory.
+
+    Files are read one at a time and go through split, embed and insert in
+    windows of about `llamaindex.ingestion.window_size` documents, so memory
+    stays flat whatever the size of the directory. Each window is committed
+    on its own and is searchable while the rest of the directory is indexed.
+
+    When the metadata has an `event_id`, the directory replaces what was
+    indexed before for that event (and `user_config_id`, if given), and the
+    files are recorded in the document manifest. Each file's old chunks are
+    replaced in the same transaction as its new ones, and the chunks of
+    files no longer in the directory are deleted once every window is in.
+    With `incremental`, only files whose content hash changed since the last
+    run are parsed and embedded.
+
+    Without an `event_id` the documents are added to the index.
+
+    Args:
+        dir_path: Path to the directory with the documents to index
+        metadata: Metadata to add to every document
+        incremental: Only index what changed since the last run of the event
+        progress: Called when the run moves to its next stage
+
+    Returns:
+        The changes made by the run
+    """
     init_settings()
 
-    vector_store = get_vector_store()
+    async def report_progress(stage: str, value: float) -> None:
+        if progress is not None:
+            await progress(stage, value)
 
-    if "event_id" in metadata:
-        event_id = metadata.get("event_id")
-        file_chunk_repository = FileChunkRepository()
-        await file_chunk_repository.delete_by_metadata("event_id", event_id)
+    report = IndexingReport()
+    await report_progress("hashing", 0.0)
+    files = await asyncio.to_thread(_hash_files, dir_path)
+    user_config_id = str(metadata.get("user_config_id", ""))
+    event_id = metadata.get("event_id")
+    scope = None
+    manifest = {}
 
-    # load the documents and create the index
-    documents = load_documents_from_dir(dir_path)
+    if event_id is None:
+        if incremental:
+            raise ValueError("Incremental indexing needs an event_id in the metadata")
+        report.added = list(files)
+    else:
+        event_id = str(event_id)
+        scope = {"event_id": event_id}
+        if user_config_id:
+            scope["user_config_id"] = user_config_id
+        manifest = await DocumentManifestRepository().get_scope(
+            user_config_id=user_config_id, event_id=event_id
+        )
+        if not manifest and incremental:
+            # Nothing recorded for the event, there is no baseline to diff
+            logger.info(f"No manifest for event {event_id}, indexing every file")
+            incremental = False
 
-    # llama index filters documents with private=true
-    # so we need to set private=false for the documents
-    # if we don't set this metadata key the documents will be ignored
-    # when we query the index
-    for doc in documents:
-        doc.metadata["private"] = "false"        
-        for key, value in metadata.items():
-            doc.metadata[key] = value
+        if incremental:
+            for file_id, (_, content_hash) in files.items():
+                if file_id not in manifest:
+                    report.added.append(file_id)
+                elif manifest[file_id].content_hash != content_hash:
+                    report.updated.append(file_id)
+                else:
+                    report.unchanged.append(file_id)
+            report.removed = [file_id for file_id in manifest if file_id not in files]
+        else:
+            report.added = list(files)
 
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    to_index = report.added + report.updated
+    file_ids = {files[file_id][0].resolve(): file_id for file_id in to_index}
+    window_size = config.get("llamaindex.ingestion.window_size")
 
-    VectorStoreIndex.from_documents(
-        documents, storage_context=storage_context, show_progress=True
-    )
+    # Created up front, creating a partition locks the whole chunk table
+    await FileChunkRepository().ensure_partition(**partition_keys(metadata))
+
+    await report_progress("indexing", 0.1)
+    # Parsing is blocking, the reader is advanced off the event loop. With
+    # parse workers, the next files are parsed while a window is embedded
+    reader = iter_documents_from_files([files[file_id][0] for file_id in to_index])
+    window_files: List[str] = []
+    window_documents: List[Document] = []
+    done = 0
+    while True:
+        item = await asyncio.to_thread(next, reader, None)
+        if item is not None:
+            path, documents, parse_seconds = item
+            file_id = file_ids[Path(path).resolve()]
+            report.parse_seconds[file_id] = parse_seconds
+            # llama index filters documents with private=true
+            # so we need to set private=false for the documents
+            # if we don't set this metadata key the documents will be ignored
+            # when we query the index
+            for doc in documents:
+                doc.metadata["private"] = "false"
+                for key, value in metadata.items():
+                    doc.metadata[key] = value
+                # Each document says which file it comes from, don't rely on
+                # the reader pairing files and documents one to one
+                doc_path = doc.metadata.get("file_path")
+                doc.metadata["file_id"] = (
+                    file_ids.get(Path(doc_path).resolve(), file_id) if doc_path else file_id
+                )
+            for doc_file_id in [file_id] + [doc.metadata["file_id"] for doc in documents]:
+                if doc_file_id not in window_files:
+                    window_files.append(doc_file_id)
+            window_documents.extend(documents)
+            if len(window_documents) < window_size:
+                continue
+        if not window_files:
+            break
+
+        nodes, stats = await _split_and_embed(window_documents)
+        await _write_window(nodes, window_files, files, scope)
+        report.chunks += len(nodes)
+        report.embeddings += stats
+        done += len(window_files)
+        logger.info(f"Indexed {done}/{len(to_index)} files of {dir_path}")
+        await report_progress("indexing", 0.1 + 0.85 * done / len(to_index))
+        window_files, window_documents = [], []
+        if item is None:
+            break
+
+    if scope is not None:
+        # Drop the chunks of files that are no longer in the directory
+        await report_progress("cleanup", 0.95)
+        session_factory = await get_session_factory()
+        async with session_factory() as session:
+            async with session.begin():
+                await FileChunkRepository(session).delete_by_files(
+                    metadata=scope, keep_file_ids=list(files)
+                )
+                await DocumentManifestRepository(session).delete_files(
+                    user_config_id=user_config_id,
+                    event_id=event_id,
+                    keep_file_ids=list(files),
+                )
+
+    logger.info(f"Indexed {dir_path}: {report}")
+    return report
 
 async def index_file_document(file_path: str, metadata: dict = None):
     """
@@ -73,7 +316,7 @@ async def index_file_document(file_path: str, metadata: dict = None):
         metadata: Optional metadata to add to the document
     
     Returns:
-        The created VectorStoreIndex
+        The VectorStoreIndex
     """
     init_settings()
     
@@ -83,15 +326,13 @@ async def index_file_document(file_path: str, metadata: dict = None):
     # Set private flag to false to ensure document is queryable
     document.metadata["private"] = "false"
     
-    # Get vector store
-    vector_store = get_vector_store()
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
-    
-    # Create index from single document
-    index = VectorStoreIndex.from_documents(
-        [document],
-        storage_context=storage_context,
-        show_progress=True
-    )
+    nodes, _ = await _split_and_embed([document])
+
+    await FileChunkRepository().ensure_partition(**partition_keys(document.metadata))
+
+    session_factory = await get_session_factory()
+    async with session_factory() as session:
+        async with session.begin():
+            await FileChunkRepository(session).add_nodes(nodes)
     
-    return index
+    return get_vector_store_service().get_index()
@@ -1,9 +1,14 @@
 import logging
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import yaml  # type: ignore
 from app.core.llamaindex.loaders.db import DBLoaderConfig, get_db_documents
-from app.core.llamaindex.loaders.file import FileLoaderConfig, get_file_documents
+from app.core.llamaindex.loaders.file import (
+    FileLoaderConfig,
+    get_file_documents,
+    iter_file_documents,
+)
 from app.core.llamaindex.loaders.web import (
     WebLoaderConfig,
     get_web_documents,
@@ -21,11 +26,24 @@ def load_configs() -> Dict[str, Any]:
     return configs
 
 
-def load_documents_from_dir(dir_path: str) -> List[Document]:
-    """Load documents from the documents directory."""
+def load_documents_from_dir(
+    dir_path: str, input_files: Optional[List[Path]] = None
+) -> List[Document]:
+    """Load documents from the documents directory, or only the given files of it."""
+    configs = load_configs()
+    loader_config = configs.get("file")
+    return get_file_documents(
+        FileLoaderConfig(**loader_config), dir_path=dir_path, input_files=input_files
+    )
+
+
+def iter_documents_from_files(
+    input_files: List[Path],
+) -> Iterator[Tuple[Path, List[Document], float]]:
+    """Load files one at a time, yielding each file with its documents and parse time."""
     configs = load_configs()
     loader_config = configs.get("file")
-    return get_file_documents(FileLoaderConfig(**loader_config), dir_path=dir_path)
+    return iter_file_documents(FileLoaderConfig(**loader_config), input_files)
 
 
 def get_documents() -> List[Document]:
@@ -1,6 +1,11 @@
 import os
 import logging
-from typing import Dict, Optional
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 from llama_parse import LlamaParse
 from pydantic import BaseModel
 from llama_index.core.schema import Document
@@ -13,6 +18,10 @@ logger = logging.getLogger(__name__)
 
 class FileLoaderConfig(BaseModel):
     use_llama_parse: bool = False
+    # Processes parsing files in parallel when indexing, 1 parses in-process
+    parse_workers: int = 1
+    # Files taking longer than this to parse are logged
+    slow_file_seconds: float = 10.0
 
 
 def llama_parse_parser():
@@ -37,20 +46,47 @@ def llama_parse_extractor() -> Dict[str, LlamaParse]:
     return {file_type: parser for file_type in SUPPORTED_FILE_TYPES}
 
 
-def get_file_documents(config: FileLoaderConfig, dir_path: str | None = None):
+def _file_extractor(config: FileLoaderConfig) -> Optional[Dict[str, LlamaParse]]:
+    if not config.use_llama_parse:
+        return None
+    # LlamaParse is async first,
+    # so we need to use nest_asyncio to run it in sync mode
+    import nest_asyncio
+
+    nest_asyncio.apply()
+
+    return llama_parse_extractor()
+
+
+def list_files(dir_path: str) -> List[Path]:
+    """List the files of a directory the same way `get_file_documents` reads them."""
     try:
-        file_extractor = None
-        if config.use_llama_parse:
-            # LlamaParse is async first,
-            # so we need to use nest_asyncio to run it in sync mode
-            import nest_asyncio
+        reader = SimpleDirectoryReader(dir_path, recursive=True)
+    except ValueError as e:
+        logger.warning(f"No files found in {dir_path}: {e}")
+        return []
+    return [Path(file) for file in reader.input_files]
 
-            nest_asyncio.apply()
 
-            file_extractor = llama_parse_extractor()
+def get_file_documents(
+    config: FileLoaderConfig,
+    dir_path: str | None = None,
+    input_files: Optional[List[Path]] = None,
+):
+    """Load the documents of a directory, or only the given files of it."""
+    try:
+        file_extractor = _file_extractor(config)
+        if input_files is not None:
+            if not input_files:
+                return []
+            reader_source = {"input_files": input_files}
+        else:
+            reader_source = {
+                "input_dir": dir_path or app_config.get("llamaindex.data_dir"),
+                "recursive": True,
+            }
         reader = SimpleDirectoryReader(
-            dir_path or app_config.get("llamaindex.data_dir"),
-            recursive=True,
+            **reader_source,
             filename_as_id=True,
             raise_on_error=True,
             file_extractor=file_extractor,
@@ -74,6 +110,98 @@ def get_file_documents(config: FileLoaderConfig, dir_path: str | None = None):
             raise e
 
 
+def _read_file(
+    path: str, file_extractor: Optional[Dict[str, LlamaParse]]
+) -> Tuple[List[Document], float]:
+    """Parse a single file, possibly into no documents, and time it."""
+    start = time.perf_counter()
+    reader = SimpleDirectoryReader(
+        input_files=[path],
+        filename_as_id=True,
+        raise_on_error=True,
+        file_extractor=file_extractor,
+    )
+    documents = reader.load_data()
+    return documents, time.perf_counter() - start
+
+
+def _parse_file(path: str, use_llama_parse: bool) -> Tuple[List[Document], float]:
+    """Parse a single file, in a parsing process."""
+    return _read_file(
+        path, _file_extractor(FileLoaderConfig(use_llama_parse=use_llama_parse))
+    )
+
+
+def _iter_parsed_in_pool(
+    config: FileLoaderConfig, input_files: List[Path]
+) -> Iterator[Tuple[Path, List[Document], float]]:
+    # Spawn, forking a process that runs an event loop and DB connections is unsafe
+    executor = ProcessPoolExecutor(
+        max_workers=config.parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        # Keep a few files ahead of the consumer, not the whole directory
+        files = iter(input_files)
+        pending = deque()
+
+        def submit(path: Optional[Path]) -> None:
+            if path is not None:
+                pending.append(
+                    (path, executor.submit(_parse_file, str(path), config.use_llama_parse))
+                )
+
+        for _ in range(config.parse_workers * 2):
+            submit(next(files, None))
+        while pending:
+            path, future = pending.popleft()
+            submit(next(files, None))
+            documents, seconds = future.result()
+            yield path, documents, seconds
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_file_documents(
+    config: FileLoaderConfig, input_files: List[Path]
+) -> Iterator[Tuple[Path, List[Document], float]]:
+    """
+    Load files one at a time, so only a few files' documents are in memory.
+
+    With `parse_workers` above 1, files are parsed in parallel by a process
+    pool and yielded in order as they are ready.
+
+    Args:
+        config: The file loader config
+        input_files: The files to load
+
+    Yields:
+        Each file with its documents, possibly none, and its parse time in seconds
+    """
+    if not input_files:
+        return
+
+    if config.parse_workers > 1 and len(input_files) > 1:
+        parsed = _iter_parsed_in_pool(config, input_files)
+    else:
+        file_extractor = _file_extractor(config)
+
+        def parse_in_process():
+            # One reader per file: a reader over several files yields
+            # nothing for files without documents, so its output can't be
+            # paired back with the files
+            for path in input_files:
+                documents, seconds = _read_file(str(path), file_extractor)
+                yield path, documents, seconds
+
+        parsed = parse_in_process()
+
+    for path, documents, seconds in parsed:
+        if seconds > config.slow_file_seconds:
+            logger.warning(f"Slow file: parsing {path} took {seconds:.1f}s")
+        yield path, documents, seconds
+
+
 def get_file_document(
     file_path: str,
     metadata: Optional[Dict] = None,
@@ -0,0 +1,132 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.schema import NodeWithScore
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def group_key(node: NodeWithScore, key: str):
+    """Value of `key` for a node: its ref_doc_id, or else a metadata value."""
+    if key == "ref_doc_id":
+        return node.node.ref_doc_id
+    return node.node.metadata.get(key)
+
+
+def collapse(nodes: Sequence[NodeWithScore], key: str) -> List[NodeWithScore]:
+    """
+    Keep the first node of every group, e.g. one chunk per source document.
+
+    Args:
+        nodes: the nodes, best first
+        key: "ref_doc_id" or a metadata key; nodes without a value are kept
+
+    Returns:
+        The first node of each group, in their original order
+    """
+    seen = set()
+    collapsed = []
+    for node in nodes:
+        value = group_key(node, key)
+        if value is not None:
+            if value in seen:
+                continue
+            seen.add(value)
+        collapsed.append(node)
+    return collapsed
+
+
+def mmr(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    top_k: int,
+    lambda_mult: float = 0.5,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """
+    Select diverse candidates with maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    `lambda_mult * relevance - (1 - lambda_mult) * max similarity to the
+    candidates already picked`. Similarities are computed once as a matrix
+    product and the running maximum is updated per pick, so a step costs
+    one vector operation over the candidates.
+
+    Args:
+        query_embedding: the embedding of the query
+        embeddings: the embeddings of the candidates
+        top_k: number of candidates to select
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        relevance: relevance of the candidates, defaults to their cosine
+            similarity to the query; rescaled to [0, 1]
+
+    Returns:
+        The indexes of the selected candidates, in selection order
+    """
+    if len(embeddings) == 0 or top_k <= 0:
+        return []
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    if relevance is None:
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        scores = vectors @ query
+    else:
+        scores = np.asarray(relevance, dtype=np.float32)
+    spread = scores.max() - scores.min()
+    scores = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+
+    similarities = vectors @ vectors.T
+    max_similarity = np.full(len(vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(top_k, len(vectors))):
+        if selected:
+            marginal = lambda_mult * scores - (1 - lambda_mult) * max_similarity
+        else:
+            marginal = scores.copy()
+        marginal[~available] = -np.inf
+        index = int(np.argmax(marginal))
+        selected.append(index)
+        available[index] = False
+        max_similarity = np.maximum(max_similarity, similarities[index])
+    return selected
+
+
+def mmr_rerank(
+    query_embedding: Sequence[float],
+    nodes: Sequence[NodeWithScore],
+    embeddings: Sequence[Sequence[float]],
+    top_k: int,
+    lambda_mult: float = 0.5,
+    group_by: Optional[str] = None,
+) -> List[NodeWithScore]:
+    """
+    Re-rank over-fetched nodes for diversity.
+
+    Args:
+        query_embedding: the embedding of the query
+        nodes: the candidate nodes, best first
+        embeddings: the embeddings of the candidate nodes
+        top_k: number of nodes to return
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        group_by: keep only the best node per value of this key before re-ranking
+
+    Returns:
+        Up to top_k nodes, in selection order, with their retrieval scores
+    """
+    candidates = list(zip(nodes, embeddings))
+    if group_by:
+        kept = {id(node) for node in collapse(nodes, group_by)}
+        candidates = [(node, embedding) for node, embedding in candidates if id(node) in kept]
+    if not candidates:
+        return []
+    selected = mmr(
+        query_embedding,
+        [embedding for _, embedding in candidates],
+        top_k=top_k,
+        lambda_mult=lambda_mult,
+        relevance=[node.score or 0.0 for node, _ in candidates],
+    )
+    return [candidates[i][0] for i in selected]
@@ -0,0 +1,77 @@
+import math
+from typing import List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import Field
+
+
+def truncate_embedding(embedding: List[float], dimension: int) -> List[float]:
+    """
+    Keep the first dimensions of a Matryoshka embedding, normalized again.
+
+    Args:
+        embedding: the full embedding of the model
+        dimension: the number of dimensions to keep
+
+    Returns:
+        The embedding itself if it already has that dimension
+    """
+    if len(embedding) == dimension:
+        return embedding
+    if len(embedding) < dimension:
+        raise ValueError(
+            f"The embedding model returned {len(embedding)} dimensions, "
+            f"fewer than the configured {dimension}"
+        )
+    truncated = embedding[:dimension]
+    norm = math.sqrt(sum(value * value for value in truncated))
+    return [value / norm for value in truncated] if norm else truncated
+
+
+class TruncatedEmbedding(BaseEmbedding):
+    """Embedding model wrapper storing the first dimensions of Matryoshka embeddings.
+
+    For models without a dimensions parameter, e.g. nomic-embed-text on
+    Ollama. Cosine similarities of the truncated, re-normalized vectors
+    stay close to those of the full vectors for models trained with
+    Matryoshka representation learning.
+    """
+
+    embed_model: BaseEmbedding
+    dimension: int = Field(gt=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TruncatedEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return truncate_embedding(
+            self.embed_model.get_query_embedding(query), self.dimension
+        )
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return truncate_embedding(
+            await self.embed_model.aget_query_embedding(query), self.dimension
+        )
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return truncate_embedding(
+            self.embed_model.get_text_embedding(text), self.dimension
+        )
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return truncate_embedding(
+            await self.embed_model.aget_text_embedding(text), self.dimension
+        )
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [
+            truncate_embedding(embedding, self.dimension)
+            for embedding in self.embed_model.get_text_embedding_batch(texts)
+        ]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [
+            truncate_embedding(embedding, self.dimension)
+            for embedding in await self.embed_model.aget_text_embedding_batch(texts)
+        ]
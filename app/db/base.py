@@ -3,6 +3,7 @@ from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from sqlalchemy import create_engine
 from typing import AsyncGenerator
 
+from app.config.app import config
 from app.core.config import settings
 
 
@@ -40,13 +41,18 @@ def get_async_database_url() -> str:
 
 
 async def init_db():
-    """Initialize the async database connection."""
+    """Initialize the async engine shared by every repository of the process."""
     global async_engine
     global AsyncSessionLocal
     if async_engine is None:
         async_engine = create_async_engine(
             get_async_database_url(),
-            echo=False,
+            echo=config.get("database.log_print"),
+            pool_size=config.get("database.pool.size"),
+            max_overflow=config.get("database.pool.max_overflow"),
+            pool_timeout=config.get("database.pool.timeout"),
+            pool_recycle=config.get("database.pool.recycle"),
+            pool_pre_ping=config.get("database.pool.pre_ping"),
         )
         AsyncSessionLocal = async_sessionmaker(
             bind=async_engine,
@@ -57,6 +63,37 @@ async def init_db():
     return async_engine
 
 
+async def close_db():
+    """Dispose the async engine and close its pooled connections."""
+    global async_engine
+    global AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+async def get_session_factory() -> async_sessionmaker:
+    """Get the async session factory, initializing the engine if needed."""
+    if AsyncSessionLocal is None:
+        await init_db()
+    return AsyncSessionLocal
+
+
+def get_pool_stats() -> dict:
+    """Get the usage of the async engine connection pool."""
+    if async_engine is None:
+        return {}
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": config.get("database.pool.max_overflow"),
+    }
+
+
 def init_sync_db():
     """Initialize the sync database connection."""
     global sync_engine
@@ -75,10 +112,13 @@ def init_sync_db():
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get an async database session."""
-    if AsyncSessionLocal is None:
-        await init_db()
-    async with AsyncSessionLocal() as session:
+    """Get an async database session.
+
+    Used as a FastAPI dependency, so every repository of a request shares
+    the same session and connection.
+    """
+    session_factory = await get_session_factory()
+    async with session_factory() as session:
         yield session
 
 
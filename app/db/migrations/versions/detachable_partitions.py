@@ -0,0 +1,118 @@
+"""List partitions for chunks without an event, so event partitions can be detached concurrently
+
+Revision ID: detachable_partitions
+Revises: embedding_dimension
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'detachable_partitions'
+down_revision: Union[str, None] = 'embedding_dimension'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every column but the generated text_search_tsv
+_COLUMNS = 'tenant_id, event_id, id, text, metadata_, node_id, embedding, embedding_half, created_at, updated_at'
+
+
+def _ensure_partition_function(no_event_partition: str) -> str:
+    return f'''
+        CREATE OR REPLACE FUNCTION data_embeddings_ensure_partition(p_tenant_id text, p_event_id text)
+        RETURNS text LANGUAGE plpgsql AS $$
+        DECLARE
+            tenant_table text := 'data_embeddings_t_' || substr(md5(p_tenant_id), 1, 16);
+            event_table text := data_embeddings_partition_name(p_tenant_id, p_event_id);
+        BEGIN
+            IF to_regclass(event_table) IS NOT NULL THEN
+                RETURN event_table;
+            END IF;
+            -- Concurrent indexing runs of the same tenant must not race
+            PERFORM pg_advisory_xact_lock(hashtext('data_embeddings_partitions'));
+            IF to_regclass(tenant_table) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF data_embeddings FOR VALUES IN (%L) PARTITION BY LIST (event_id)',
+                    tenant_table, p_tenant_id
+                );
+                EXECUTE {no_event_partition};
+            END IF;
+            IF to_regclass(event_table) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+                    event_table, tenant_table, p_event_id
+                );
+            END IF;
+            RETURN event_table;
+        END
+        $$
+    '''
+
+
+def upgrade() -> None:
+    # DETACH PARTITION CONCURRENTLY isn't allowed on a table with a default
+    # partition. Chunks without an event (event_id '') get a list partition
+    # instead of the tenant's default one, under the same name.
+    op.execute(_ensure_partition_function(
+        "format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)', "
+        "tenant_table || '_default', tenant_table, '')"
+    ))
+    op.execute(f'''
+        DO $$
+        DECLARE
+            tenant record;
+        BEGIN
+            FOR tenant IN
+                SELECT parent.relname AS tenant_table, child.relname AS default_table
+                FROM pg_partitioned_table pt
+                JOIN pg_class parent ON parent.oid = pt.partrelid
+                JOIN pg_class child ON child.oid = pt.partdefid
+                WHERE parent.relname LIKE 'data_embeddings_t_%'
+            LOOP
+                EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', tenant.tenant_table, tenant.default_table);
+                -- Chunks of events that had no partition get their own
+                EXECUTE format(
+                    'SELECT data_embeddings_ensure_partition(tenant_id, event_id) '
+                    'FROM (SELECT DISTINCT tenant_id, event_id FROM %I WHERE event_id <> %L) AS scopes',
+                    tenant.default_table, ''
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE event_id <> %L RETURNING {_COLUMNS}) '
+                    'INSERT INTO %I ({_COLUMNS}) SELECT {_COLUMNS} FROM moved',
+                    tenant.default_table, '', tenant.tenant_table
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES IN (%L)',
+                    tenant.tenant_table, tenant.default_table, ''
+                );
+            END LOOP;
+        END
+        $$
+    ''')
+
+
+def downgrade() -> None:
+    op.execute(_ensure_partition_function(
+        "format('CREATE TABLE %I PARTITION OF %I DEFAULT', tenant_table || '_default', tenant_table)"
+    ))
+    op.execute('''
+        DO $$
+        DECLARE
+            tenant record;
+        BEGIN
+            FOR tenant IN
+                SELECT parent.relname AS tenant_table, parent.relname || '_default' AS default_table
+                FROM pg_partitioned_table pt
+                JOIN pg_class parent ON parent.oid = pt.partrelid
+                WHERE parent.relname LIKE 'data_embeddings_t_%'
+                  AND pt.partdefid = 0
+                  AND to_regclass(parent.relname || '_default') IS NOT NULL
+            LOOP
+                EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', tenant.tenant_table, tenant.default_table);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', tenant.tenant_table, tenant.default_table);
+            END LOOP;
+        END
+        $$
+    ''')
@@ -0,0 +1,33 @@
+"""Document manifests
+
+Revision ID: document_manifests
+Revises: embedding_cache
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'document_manifests'
+down_revision: Union[str, None] = 'embedding_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document_manifests',
+        sa.Column('user_config_id', sa.String, primary_key=True),
+        sa.Column('event_id', sa.String, primary_key=True),
+        sa.Column('file_id', sa.String, primary_key=True),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('chunks', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('indexed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('document_manifests')
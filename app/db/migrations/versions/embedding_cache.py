@@ -0,0 +1,37 @@
+"""Embedding cache
+
+Revision ID: embedding_cache
+Revises: initial_schema
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = 'embedding_cache'
+down_revision: Union[str, None] = 'initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'embedding_cache',
+        sa.Column('kind', sa.String(16), primary_key=True),
+        sa.Column('content_hash', sa.String(64), primary_key=True),
+        sa.Column('model', sa.String, primary_key=True),
+        sa.Column('dimension', sa.Integer, primary_key=True),
+        sa.Column('embedding', Vector(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_index('ix_embedding_cache_last_used_at', 'embedding_cache', ['last_used_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_embedding_cache_last_used_at', table_name='embedding_cache')
+    op.drop_table('embedding_cache')
@@ -0,0 +1,85 @@
+"""Resize embeddings to the configured dimension
+
+Revision ID: embedding_dimension
+Revises: quantized_embeddings
+Create Date: 2026-10-18
+
+"""
+import os
+from dotenv import load_dotenv
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config.app import embedding_dimension
+
+load_dotenv()
+
+# revision identifiers, used by Alembic.
+revision: str = 'embedding_dimension'
+down_revision: Union[str, None] = 'quantized_embeddings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _current_dimension() -> int:
+    # pgvector stores the dimension of a column as its type modifier
+    return op.get_bind().execute(sa.text('''
+        SELECT atttypmod FROM pg_attribute
+        WHERE attrelid = 'data_embeddings'::regclass AND attname = 'embedding'
+    ''')).scalar()
+
+
+def _empty() -> bool:
+    return op.get_bind().execute(
+        sa.text('SELECT NOT EXISTS (SELECT 1 FROM data_embeddings)')
+    ).scalar()
+
+
+def _resize(dimension: int) -> None:
+    # Its expression quantizes to the previous dimension, build it again
+    # with `manage_vector_index build --quantization bit`
+    op.execute('DROP INDEX IF EXISTS ix_data_embeddings_embedding_bit_hnsw')
+    # Matryoshka truncation: keep the first dimensions and normalize again.
+    # Rewrites the table and rebuilds the HNSW indexes.
+    op.execute(f'''
+        ALTER TABLE data_embeddings
+        ALTER COLUMN embedding TYPE VECTOR({dimension})
+            USING l2_normalize(subvector(embedding, 1, {dimension}))::vector({dimension}),
+        ALTER COLUMN embedding_half TYPE HALFVEC({dimension})
+            USING l2_normalize(subvector(embedding_half, 1, {dimension}))::halfvec({dimension})
+    ''')
+
+
+def upgrade() -> None:
+    # The earlier revisions size the columns by LLM_OLLAMA_EMBEDDING_DIMENSION,
+    # this one by llamaindex.embedding.dimension
+    dimension = embedding_dimension()
+    current = _current_dimension()
+    if current == dimension:
+        return
+    # An empty table, e.g. a new database, can take any dimension
+    if 0 < current < dimension and not _empty():
+        raise RuntimeError(
+            f'data_embeddings has {current} dimensions, embeddings can only be '
+            f'truncated to {dimension} dimensions, not extended. Recreate the '
+            'table and index the documents again.'
+        )
+    _resize(dimension)
+
+
+def downgrade() -> None:
+    # Back to the dimension the earlier revisions create the columns with
+    dimension = int(os.getenv('LLM_OLLAMA_EMBEDDING_DIMENSION', 768))
+    current = _current_dimension()
+    if current == dimension:
+        return
+    if 0 < current < dimension and not _empty():
+        raise RuntimeError(
+            f'data_embeddings has {current} dimensions, the truncated dimensions '
+            f'are gone and can\'t be extended back to {dimension}. Empty the '
+            'table, downgrade and index the documents again.'
+        )
+    _resize(dimension)
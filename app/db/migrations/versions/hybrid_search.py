@@ -0,0 +1,42 @@
+"""Full-text search column for hybrid retrieval
+
+Revision ID: hybrid_search
+Revises: jsonb_metadata
+Create Date: 2026-10-18
+
+"""
+import os
+from dotenv import load_dotenv
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+load_dotenv()
+
+# revision identifiers, used by Alembic.
+revision: str = 'hybrid_search'
+down_revision: Union[str, None] = 'jsonb_metadata'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # "simple" doesn't stem or drop stop words, names and acronyms match as written
+    # Fails unless it names a text search configuration, and is quoted as a literal
+    text_search_config = op.get_bind().execute(
+        sa.text('SELECT quote_literal(CAST(CAST(:config AS regconfig) AS text))'),
+        {'config': os.getenv('LLAMA_INDEX_TEXT_SEARCH_CONFIG', 'simple')},
+    ).scalar()
+    # Rewrites the table to compute the column for the existing rows
+    op.execute(f'''
+        ALTER TABLE data_embeddings ADD COLUMN text_search_tsv TSVECTOR
+        GENERATED ALWAYS AS (to_tsvector({text_search_config}::regconfig, text)) STORED
+    ''')
+    op.execute('CREATE INDEX ix_data_embeddings_text_search_tsv ON data_embeddings USING gin (text_search_tsv)')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX ix_data_embeddings_text_search_tsv')
+    op.execute('ALTER TABLE data_embeddings DROP COLUMN text_search_tsv')
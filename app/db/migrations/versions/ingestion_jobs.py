@@ -0,0 +1,47 @@
+"""Ingestion jobs
+
+Revision ID: ingestion_jobs
+Revises: document_manifests
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'ingestion_jobs'
+down_revision: Union[str, None] = 'document_manifests'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('status', sa.String(16), nullable=False, server_default='queued'),
+        sa.Column('stage', sa.String(32), nullable=True),
+        sa.Column('progress', sa.Float, nullable=False, server_default='0'),
+        sa.Column('payload', sa.JSON, nullable=False),
+        sa.Column('result', sa.JSON, nullable=True),
+        sa.Column('error', sa.Text, nullable=True),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('worker', sa.String, nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+    )
+    op.create_index(
+        'ix_ingestion_jobs_status_created_at',
+        'ingestion_jobs',
+        ['status', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_jobs_status_created_at', table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
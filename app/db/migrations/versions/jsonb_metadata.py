@@ -0,0 +1,36 @@
+"""JSONB chunk metadata with GIN and expression indexes
+
+Revision ID: jsonb_metadata
+Revises: partitioned_embeddings
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'jsonb_metadata'
+down_revision: Union[str, None] = 'partitioned_embeddings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Metadata keys filtered on by the repositories and the vector store
+FILTER_KEYS = ['user_config_id', 'event_id', 'private', 'file_id']
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE data_embeddings ALTER COLUMN metadata_ TYPE JSONB USING metadata_::jsonb')
+
+    # Containment filters (metadata_ @> '{"key": "value"}') on any key
+    op.execute('CREATE INDEX ix_data_embeddings_metadata ON data_embeddings USING gin (metadata_ jsonb_path_ops)')
+    # Equality and IN filters on the keys we filter on most
+    for key in FILTER_KEYS:
+        op.execute(f"CREATE INDEX ix_data_embeddings_metadata_{key} ON data_embeddings ((metadata_ ->> '{key}'))")
+
+
+def downgrade() -> None:
+    for key in FILTER_KEYS:
+        op.execute(f'DROP INDEX ix_data_embeddings_metadata_{key}')
+    op.execute('DROP INDEX ix_data_embeddings_metadata')
+    op.execute('ALTER TABLE data_embeddings ALTER COLUMN metadata_ TYPE JSON USING metadata_::json')
@@ -0,0 +1,161 @@
+"""Partition data_embeddings by tenant and event
+
+Revision ID: partitioned_embeddings
+Revises: ingestion_jobs
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'partitioned_embeddings'
+down_revision: Union[str, None] = 'ingestion_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _embedding_type() -> str:
+    # The column keeps its dimension, see the embedding_dimension migration
+    return op.get_bind().execute(sa.text('''
+        SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = 'data_embeddings'::regclass AND attname = 'embedding'
+    ''')).scalar()
+
+
+def upgrade() -> None:
+    embedding_type = _embedding_type()
+
+    # Keep the current table aside, its rows are moved at the end
+    op.execute('ALTER TABLE data_embeddings RENAME TO data_embeddings_legacy')
+    op.execute('ALTER SEQUENCE IF EXISTS data_embeddings_id_seq RENAME TO data_embeddings_legacy_id_seq')
+    op.execute('ALTER INDEX IF EXISTS data_embeddings_pkey RENAME TO data_embeddings_legacy_pkey')
+
+    # Tenants (user configs) get a partition each, sub-partitioned by event.
+    # Chunks without an event go to the tenant's default partition.
+    op.execute(f'''
+        CREATE TABLE data_embeddings (
+            tenant_id VARCHAR NOT NULL DEFAULT '',
+            event_id VARCHAR NOT NULL DEFAULT '',
+            id BIGSERIAL NOT NULL,
+            text TEXT NOT NULL,
+            metadata_ JSON,
+            node_id VARCHAR,
+            embedding {embedding_type},
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (tenant_id, event_id, id)
+        ) PARTITION BY LIST (tenant_id)
+    ''')
+    op.execute('CREATE TABLE data_embeddings_default PARTITION OF data_embeddings DEFAULT')
+
+    op.execute('''
+        CREATE FUNCTION data_embeddings_partition_name(p_tenant_id text, p_event_id text)
+        RETURNS text LANGUAGE sql IMMUTABLE AS $$
+            SELECT 'data_embeddings_t_' || substr(md5(p_tenant_id), 1, 16)
+                || CASE WHEN p_event_id = '' THEN '_default'
+                        ELSE '_e_' || substr(md5(p_event_id), 1, 16) END
+        $$
+    ''')
+    op.execute('''
+        CREATE FUNCTION data_embeddings_ensure_partition(p_tenant_id text, p_event_id text)
+        RETURNS text LANGUAGE plpgsql AS $$
+        DECLARE
+            tenant_table text := 'data_embeddings_t_' || substr(md5(p_tenant_id), 1, 16);
+            event_table text := data_embeddings_partition_name(p_tenant_id, p_event_id);
+        BEGIN
+            IF to_regclass(event_table) IS NOT NULL THEN
+                RETURN event_table;
+            END IF;
+            -- Concurrent indexing runs of the same tenant must not race
+            PERFORM pg_advisory_xact_lock(hashtext('data_embeddings_partitions'));
+            IF to_regclass(tenant_table) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF data_embeddings FOR VALUES IN (%L) PARTITION BY LIST (event_id)',
+                    tenant_table, p_tenant_id
+                );
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I DEFAULT',
+                    tenant_table || '_default', tenant_table
+                );
+            END IF;
+            IF to_regclass(event_table) IS NULL THEN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+                    event_table, tenant_table, p_event_id
+                );
+            END IF;
+            RETURN event_table;
+        END
+        $$
+    ''')
+
+    op.execute('''
+        SELECT data_embeddings_ensure_partition(tenant_id, event_id)
+        FROM (
+            SELECT DISTINCT
+                coalesce(metadata_::jsonb ->> 'user_config_id', '') AS tenant_id,
+                coalesce(metadata_::jsonb ->> 'event_id', '') AS event_id
+            FROM data_embeddings_legacy
+        ) AS scopes
+    ''')
+    op.execute('''
+        INSERT INTO data_embeddings (tenant_id, event_id, id, text, metadata_, node_id, embedding)
+        SELECT
+            coalesce(metadata_::jsonb ->> 'user_config_id', ''),
+            coalesce(metadata_::jsonb ->> 'event_id', ''),
+            id, text, metadata_, node_id, embedding
+        FROM data_embeddings_legacy
+    ''')
+    op.execute('''
+        SELECT setval(
+            'data_embeddings_id_seq',
+            coalesce((SELECT max(id) FROM data_embeddings), 0) + 1,
+            false
+        )
+    ''')
+    op.execute('DROP TABLE data_embeddings_legacy')
+
+    # Created on the parent, Postgres builds one HNSW index per partition,
+    # also for partitions created later
+    op.execute('''
+        CREATE INDEX ix_data_embeddings_embedding_hnsw ON data_embeddings
+        USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+    ''')
+    op.execute('CREATE INDEX ix_data_embeddings_node_id ON data_embeddings (node_id)')
+
+
+def downgrade() -> None:
+    embedding_type = _embedding_type()
+
+    op.execute('ALTER TABLE data_embeddings RENAME TO data_embeddings_partitioned')
+    op.execute('ALTER SEQUENCE data_embeddings_id_seq RENAME TO data_embeddings_partitioned_id_seq')
+    op.execute('ALTER INDEX data_embeddings_pkey RENAME TO data_embeddings_partitioned_pkey')
+    op.execute(f'''
+        CREATE TABLE data_embeddings (
+            id BIGSERIAL PRIMARY KEY,
+            text TEXT NOT NULL,
+            metadata_ JSON,
+            node_id VARCHAR,
+            embedding {embedding_type},
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    ''')
+    op.execute('''
+        INSERT INTO data_embeddings (id, text, metadata_, node_id, embedding, created_at, updated_at)
+        SELECT id, text, metadata_, node_id, embedding, created_at, updated_at
+        FROM data_embeddings_partitioned
+    ''')
+    op.execute('''
+        SELECT setval(
+            'data_embeddings_id_seq',
+            coalesce((SELECT max(id) FROM data_embeddings), 0) + 1,
+            false
+        )
+    ''')
+    op.execute('DROP TABLE data_embeddings_partitioned CASCADE')
+    op.execute('DROP FUNCTION data_embeddings_ensure_partition(text, text)')
+    op.execute('DROP FUNCTION data_embeddings_partition_name(text, text)')
@@ -0,0 +1,37 @@
+"""Half-precision embedding column for quantized indexes
+
+Revision ID: quantized_embeddings
+Revises: hybrid_search
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'quantized_embeddings'
+down_revision: Union[str, None] = 'hybrid_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # halfvec and binary_quantize need pgvector >= 0.7
+    # Same dimension as the embedding column
+    dimension = op.get_bind().execute(sa.text('''
+        SELECT atttypmod FROM pg_attribute
+        WHERE attrelid = 'data_embeddings'::regclass AND attname = 'embedding'
+    ''')).scalar()
+    # Nullable without default, doesn't rewrite the table. Existing rows are
+    # filled with `manage_vector_index backfill-halfvec` and the halfvec and
+    # bit indexes built with `manage_vector_index build --quantization`, both
+    # without blocking writes.
+    op.execute(f'ALTER TABLE data_embeddings ADD COLUMN embedding_half HALFVEC({dimension})')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_data_embeddings_embedding_half_hnsw')
+    op.execute('DROP INDEX IF EXISTS ix_data_embeddings_embedding_bit_hnsw')
+    op.execute('ALTER TABLE data_embeddings DROP COLUMN embedding_half')
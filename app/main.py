@@ -1,14 +1,36 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config.app import config
+from app.api.middleware import MaxBodySizeMiddleware
 from app.api.routes import api_router
+from app.db.base import close_db, init_db
+from app.services.agent_memory import agent_memory
+from app.services.mcp_pool import mcp_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the process-wide resources shared by all requests."""
+    await init_db()
+    await mcp_pool.start()
+    await agent_memory.start()
+    try:
+        yield
+    finally:
+        await agent_memory.close()
+        await mcp_pool.close()
+        await close_db()
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=config.get("api.title"),
         version=config.get("api.version"),
         debug=config.get("app.debug"),
+        lifespan=lifespan,
     )
 
     # Configure CORS
@@ -21,6 +43,11 @@ def create_app() -> FastAPI:
             allow_headers=config.get("cors.headers"),
         )
 
+    app.add_middleware(
+        MaxBodySizeMiddleware,
+        max_size=config.get("ingestion.max_request_size"),
+    )
+
     # Include routers
     app.include_router(api_router, prefix=config.get("api.prefix"))
 
@@ -1,6 +1,9 @@
 from app.models.base import Base
+from app.models.document_manifest import DocumentManifest
+from app.models.embedding_cache import EmbeddingCache
+from app.models.ingestion_job import IngestionJob
 from app.models.thread import Thread
 from app.models.user_config import UserConfig
 from app.models.relationships import *  # This will set up the relationships
 
-__all__ = ["Base", "Thread", "UserConfig"]
+__all__ = ["Base", "DocumentManifest", "EmbeddingCache", "IngestionJob", "Thread", "UserConfig"]
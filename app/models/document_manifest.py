@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class DocumentManifest(Base):
+    """Model for the files indexed for a tenant and event, with their content hash."""
+
+    __tablename__ = "document_manifests"
+
+    user_config_id = Column(String, primary_key=True)
+    event_id = Column(String, primary_key=True)
+    # Path of the file relative to the indexed directory
+    file_id = Column(String, primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    chunks = Column(Integer, nullable=False, default=0)
+    indexed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+
+from app.models.base import Base
+
+
+class EmbeddingCache(Base):
+    """Model for embeddings cached by content hash, model and dimension."""
+
+    __tablename__ = "embedding_cache"
+
+    # "query" or "text": some models embed queries and documents differently
+    kind = Column(String(16), primary_key=True)
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String, primary_key=True)
+    dimension = Column(Integer, primary_key=True)
+    embedding = Column(Vector(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
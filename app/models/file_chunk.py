@@ -1,18 +1,42 @@
 from typing import Dict, Optional
 
-from sqlalchemy import Column, String, JSON, Text, Integer
-from sqlalchemy.dialects.postgresql import UUID
-from pgvector.sqlalchemy import Vector
+from sqlalchemy import BigInteger, Column, Computed, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from pgvector.sqlalchemy import HALFVEC, Vector
 
+from app.config.app import config
 from app.models.base import Base
 
 class FileChunk(Base):
-    """Model for storing file chunks with embeddings."""
+    """Model for storing file chunks with embeddings.
+
+    The table is list-partitioned by `tenant_id` (the user config) and each
+    tenant partition by `event_id`, see the `partitioned_embeddings`
+    migration. Both keys are copies of the chunk metadata, empty when the
+    chunk has none.
+    """
     
     __tablename__ = "data_embeddings"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(String, primary_key=True, default="")
+    event_id = Column(String, primary_key=True, default="")
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     text = Column(Text, nullable=False)
-    metadata_ = Column(JSON, nullable=True)
+    metadata_ = Column(JSONB, nullable=True)
     node_id = Column(String, nullable=True)
-    embedding = Column(Vector(768), nullable=True)  # Using 1536 dimensions for OpenAI embeddings 
\ No newline at end of file
+    # Sized by llamaindex.embedding.dimension, see the embedding_dimension migration
+    embedding = Column(Vector(config.get("llamaindex.embedding.dimension")), nullable=True)
+    # Half-precision copy of the embedding, searched by the halfvec index
+    # (llamaindex.quantization.index). Written with every chunk, older ones
+    # are filled by `manage_vector_index backfill-halfvec`.
+    embedding_half = Column(
+        HALFVEC(config.get("llamaindex.embedding.dimension")), nullable=True
+    )
+    # Full-text search vector, generated by Postgres from the text
+    text_search_tsv = Column(
+        TSVECTOR,
+        Computed(
+            f"to_tsvector('{config.get('llamaindex.hybrid.text_search_config')}', text)",
+            persisted=True,
+        ),
+    )
@@ -0,0 +1,37 @@
+from uuid import uuid4
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, JSON, String, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class IngestionJob(Base):
+    """Model for the indexing jobs run by the index workers."""
+
+    __tablename__ = "ingestion_jobs"
+    __table_args__ = (Index("ix_ingestion_jobs_status_created_at", "status", "created_at"),)
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    status = Column(String(16), nullable=False, default=QUEUED)
+    # Step of the indexing run, and its progress between 0 and 1
+    stage = Column(String(32), nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    # Arguments of `index_file_documents`
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Also the heartbeat of running jobs, every progress update touches it
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,12 +1,14 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Type, TypeVar, Union
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.base import Base, get_async_database_url
+from app.db.base import Base, get_session_factory
+from app.repositories.cache import RepositoryCache
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -14,47 +16,73 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    """Base repository with default CRUD operations."""
+    """Base repository with default CRUD operations.
 
-    def __init__(self, model: Type[ModelType]):
+    Repositories that set `cache` and `cache_schema` serve `get_cached`
+    from an in-process cache of schema snapshots; `update` and `delete`
+    invalidate the cached record. Without a cache, `get_cached` reads the
+    database.
+    """
+
+    cache: Optional[RepositoryCache] = None
+    cache_schema: Optional[Type[BaseModel]] = None
+
+    def __init__(self, model: Type[ModelType], session: Optional[AsyncSession] = None):
+        """
+        Args:
+            model: the SQLAlchemy model handled by the repository
+            session: a session to run every operation on, usually the
+                request-scoped session from `app.db.base.get_db`. When not
+                given, each operation opens its own session from the shared
+                engine.
+        """
         self.model = model
-        self._engine = None
-        self._async_session = None
-
-    @property
-    async def engine(self):
-        """Get or create the database engine."""
-        if self._engine is None:
-            self._engine = create_async_engine(
-                get_async_database_url(),
-                echo=False,
-            )
-        return self._engine
-
-    @property
-    async def session(self) -> AsyncSession:
-        """Get or create a database session."""
-        if self._async_session is None:
-            engine = await self.engine
-            self._async_session = async_sessionmaker(
-                bind=engine,
-                class_=AsyncSession,
-                expire_on_commit=False,
-                autoflush=False,
-            )
-        return self._async_session()
+        self._session = session
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """Get the repository session or open a new one from the shared engine."""
+        if self._session is not None:
+            yield self._session
+            return
+        session_factory = await get_session_factory()
+        async with session_factory() as session:
+            yield session
 
     async def get(self, id: UUID) -> Optional[ModelType]:
         """Get a single record by ID."""
-        async with await self.session as session:
+        async with self.session() as session:
             result = await session.execute(select(self.model).filter(self.model.id == id))
             return result.scalar_one_or_none()
 
+    async def get_cached(self, id: UUID) -> Optional[BaseModel]:
+        """
+        Get a read-only snapshot of a record, reading through the cache.
+
+        Returns:
+            The record as `cache_schema`, or the record itself for
+            repositories without one
+        """
+        id = UUID(str(id))
+        if self.cache is None or self.cache_schema is None:
+            db_obj = await self.get(id=id)
+            if db_obj is None or self.cache_schema is None:
+                return db_obj
+            return self.cache_schema.model_validate(db_obj)
+        snapshot = self.cache.get(id)
+        if snapshot is None:
+            db_obj = await self.get(id=id)
+            if db_obj is None:
+                return None
+            snapshot = self.cache_schema.model_validate(db_obj)
+            self.cache.set(id, snapshot)
+        return snapshot
+
     async def get_multi(
         self, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
         """Get multiple records with pagination."""
-        async with await self.session as session:
+        async with self.session() as session:
             result = await session.execute(
                 select(self.model).offset(skip).limit(limit)
             )
@@ -64,7 +92,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """Create a new record."""
-        async with await self.session as session:
+        async with self.session() as session:
             obj_in_data = jsonable_encoder(obj_in)
             db_obj = self.model(**obj_in_data)
             session.add(db_obj)
@@ -79,7 +107,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """Update a record."""
-        async with await self.session as session:
+        async with self.session() as session:
             obj_data = jsonable_encoder(db_obj)
             if isinstance(obj_in, dict):
                 update_data = obj_in
@@ -91,13 +119,17 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             session.add(db_obj)
             await session.commit()
             await session.refresh(db_obj)
+            if self.cache is not None:
+                self.cache.invalidate(db_obj.id)
             return db_obj
 
     async def delete(self, *, id: UUID) -> Optional[ModelType]:
         """Delete a record."""
-        async with await self.session as session:
-            obj = await self.get(id=id)
+        async with self.session() as session:
+            obj = await session.get(self.model, id)
             if obj:
                 await session.delete(obj)
                 await session.commit()
+                if self.cache is not None:
+                    self.cache.invalidate(obj.id)
             return obj 
\ No newline at end of file
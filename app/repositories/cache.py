@@ -0,0 +1,52 @@
+from typing import Any, Hashable, Optional
+
+from cachetools import TTLCache
+
+from app.config.app import config
+
+
+class RepositoryCache:
+    """In-process TTL/LRU cache for records that are read far more than written.
+
+    Entries are invalidated by the repository on every write made by this
+    process; writes made by other workers become visible when the TTL expires.
+    """
+
+    def __init__(
+        self, name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None
+    ):
+        self.name = name
+        self._cache = TTLCache(
+            maxsize=maxsize or config.get("cache.maxsize"),
+            ttl=ttl or config.get("cache.ttl"),
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._cache[key] = value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": self._cache.currsize,
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
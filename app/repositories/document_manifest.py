@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.models.document_manifest import DocumentManifest
+from app.repositories.base import BaseRepository
+from app.schemas.document_manifest import DocumentManifestCreate, DocumentManifestInDB
+
+
+class DocumentManifestRepository(
+    BaseRepository[DocumentManifest, DocumentManifestCreate, DocumentManifestInDB]
+):
+    """Repository for the manifest of indexed files per tenant and event.
+
+    Write methods don't commit, so they can share a transaction with the
+    chunk writes of the same indexing run.
+    """
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(DocumentManifest, session)
+
+    async def get_scope(
+        self, *, user_config_id: str, event_id: str
+    ) -> Dict[str, DocumentManifest]:
+        """Get the manifest entries of a tenant and event, by file id."""
+        async with self.session() as session:
+            result = await session.execute(
+                select(DocumentManifest).where(
+                    DocumentManifest.user_config_id == user_config_id,
+                    DocumentManifest.event_id == event_id,
+                )
+            )
+            return {entry.file_id: entry for entry in result.scalars().all()}
+
+    async def upsert_many(self, *, entries: List[DocumentManifestCreate]) -> None:
+        """Insert manifest entries or update the hash of existing ones."""
+        if not entries:
+            return
+        async with self.session() as session:
+            stmt = insert(DocumentManifest).values(
+                [entry.model_dump() for entry in entries]
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["user_config_id", "event_id", "file_id"],
+                    set_={
+                        "content_hash": stmt.excluded.content_hash,
+                        "chunks": stmt.excluded.chunks,
+                        "indexed_at": func.now(),
+                    },
+                )
+            )
+
+    async def delete_files(
+        self,
+        *,
+        user_config_id: str,
+        event_id: str,
+        file_ids: Optional[List[str]] = None,
+        keep_file_ids: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Delete the given files from a scope, or the whole scope when no files are given.
+
+        Args:
+            user_config_id: the tenant of the scope
+            event_id: the event of the scope
+            file_ids: only delete these files
+            keep_file_ids: don't delete these files
+
+        Returns:
+            The number of files deleted
+        """
+        conditions = [
+            DocumentManifest.user_config_id == user_config_id,
+            DocumentManifest.event_id == event_id,
+        ]
+        if file_ids is not None:
+            if not file_ids:
+                return 0
+            conditions.append(DocumentManifest.file_id.in_(file_ids))
+        if keep_file_ids:
+            conditions.append(DocumentManifest.file_id.notin_(keep_file_ids))
+        async with self.session() as session:
+            result = await session.execute(delete(DocumentManifest).where(*conditions))
+            return result.rowcount
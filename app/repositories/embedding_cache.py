@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.embedding_cache import EmbeddingCache
+from app.repositories.base import BaseRepository
+from app.schemas.embedding_cache import EmbeddingCacheCreate, EmbeddingCacheInDB
+
+# Keeps the number of bind parameters per statement well below Postgres' limit
+BATCH_SIZE = 1000
+
+
+class EmbeddingCacheRepository(
+    BaseRepository[EmbeddingCache, EmbeddingCacheCreate, EmbeddingCacheInDB]
+):
+    """Repository for embeddings cached by content hash."""
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(EmbeddingCache, session)
+
+    async def get_many(
+        self, *, kind: str, model: str, dimension: int, content_hashes: List[str]
+    ) -> Dict[str, List[float]]:
+        """
+        Get the cached embeddings of the given content hashes.
+
+        Args:
+            kind: "query" or "text"
+            model: name of the embedding model
+            dimension: dimension of the embeddings
+            content_hashes: sha256 hex digests of the embedded contents
+
+        Returns:
+            The embeddings found, by content hash
+        """
+        found: Dict[str, List[float]] = {}
+        async with self.session() as session:
+            for i in range(0, len(content_hashes), BATCH_SIZE):
+                batch = content_hashes[i:i + BATCH_SIZE]
+                conditions = (
+                    EmbeddingCache.kind == kind,
+                    EmbeddingCache.model == model,
+                    EmbeddingCache.dimension == dimension,
+                    EmbeddingCache.content_hash.in_(batch),
+                )
+                result = await session.execute(
+                    select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(
+                        *conditions
+                    )
+                )
+                rows = result.all()
+                if rows:
+                    await session.execute(
+                        update(EmbeddingCache)
+                        .where(*conditions)
+                        .values(last_used_at=func.now())
+                    )
+                found.update(
+                    {content_hash: [float(x) for x in embedding] for content_hash, embedding in rows}
+                )
+            await session.commit()
+        return found
+
+    async def put_many(
+        self, *, kind: str, model: str, dimension: int, embeddings: Dict[str, List[float]]
+    ) -> None:
+        """Store embeddings by content hash, keeping existing entries."""
+        items = list(embeddings.items())
+        async with self.session() as session:
+            for i in range(0, len(items), BATCH_SIZE):
+                await session.execute(
+                    insert(EmbeddingCache)
+                    .values(
+                        [
+                            {
+                                "kind": kind,
+                                "content_hash": content_hash,
+                                "model": model,
+                                "dimension": dimension,
+                                "embedding": embedding,
+                            }
+                            for content_hash, embedding in items[i:i + BATCH_SIZE]
+                        ]
+                    )
+                    .on_conflict_do_nothing()
+                )
+            await session.commit()
+
+    async def stats(self) -> List[Dict]:
+        """Get the number of entries and their age by kind, model and dimension."""
+        async with self.session() as session:
+            result = await session.execute(
+                select(
+                    EmbeddingCache.kind,
+                    EmbeddingCache.model,
+                    EmbeddingCache.dimension,
+                    func.count().label("entries"),
+                    func.min(EmbeddingCache.created_at).label("oldest"),
+                    func.max(EmbeddingCache.last_used_at).label("last_used"),
+                ).group_by(
+                    EmbeddingCache.kind, EmbeddingCache.model, EmbeddingCache.dimension
+                )
+            )
+            return [dict(row._mapping) for row in result]
+
+    async def prune(
+        self,
+        *,
+        unused_since: Optional[datetime] = None,
+        kind: Optional[str] = None,
+        model: Optional[str] = None,
+        all: bool = False,
+    ) -> int:
+        """
+        Delete cached embeddings.
+
+        At least one filter is required, or `all` to empty the cache.
+
+        Args:
+            unused_since: only delete entries not used since this moment
+            kind: only delete entries of this kind
+            model: only delete entries of this embedding model
+            all: delete every entry when no filter is given
+
+        Returns:
+            The number of deleted entries
+        """
+        conditions = []
+        if unused_since is not None:
+            conditions.append(EmbeddingCache.last_used_at < unused_since)
+        if kind is not None:
+            conditions.append(EmbeddingCache.kind == kind)
+        if model is not None:
+            conditions.append(EmbeddingCache.model == model)
+        if not conditions and not all:
+            raise ValueError("Give a filter to prune the embedding cache, or all=True")
+        async with self.session() as session:
+            result = await session.execute(delete(EmbeddingCache).where(*conditions))
+            await session.commit()
+            return result.rowcount
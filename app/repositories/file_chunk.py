@@ -1,20 +1,68 @@
-from typing import List, Optional
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select, func, delete, cast, String, Integer
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from pgvector.asyncpg import register_vector
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import CTE, Float, Row, Select, and_, cast, literal, select, delete, func, or_, text, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
+from app.config.app import config
+from app.db.base import init_db
 from app.models.file_chunk import FileChunk
 from app.repositories.base import BaseRepository
 from app.schemas.file_chunk import FileChunkBase, FileChunkInDB
 
+# Metadata keys copied to the partition key columns
+_PARTITION_KEYS = {"user_config_id": "tenant_id", "event_id": "event_id"}
+
+
+def partition_keys(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """Get the partition key columns of a chunk from its metadata."""
+    return {
+        column: str(metadata.get(key) or "")
+        for key, column in _PARTITION_KEYS.items()
+    }
+
+
+def _binary_quantize(vector, dimension: int):
+    # Must match the expression of the bit index, see manage_vector_index
+    return cast(func.binary_quantize(vector), BIT(dimension))
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN ANALYZE of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
 class FileChunkRepository(BaseRepository[FileChunk, FileChunkBase, FileChunkInDB]):
-    """Repository for managing FileChunk entities."""
+    """Repository for managing FileChunk entities.
+
+    Filters on `user_config_id` and `event_id` use the partition key
+    columns, so Postgres only touches the partitions of the tenant and
+    event.
+    """
     
-    def __init__(self):
-        super().__init__(FileChunk)
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(FileChunk, session)
 
     async def get_by_node_id(self, node_id: str) -> Optional[FileChunk]:
         """Get a file chunk by its node_id."""
-        async with self.session as session:
+        async with self.session() as session:
             result = await session.execute(
                 select(FileChunk).where(FileChunk.node_id == node_id)
             )
@@ -22,30 +70,606 @@ class FileChunkRepository(BaseRepository[FileChunk, FileChunkBase, FileChunkInDB
     
     async def get_by_metadata(self, metadata_key: str, metadata_value: str) -> List[FileChunk]:
         """Get file chunks by metadata key-value pair."""
-        async with self.session as session:
+        async with self.session() as session:
             result = await session.execute(
                 select(FileChunk).where(
-                    FileChunk.metadata_[metadata_key].astext == metadata_value
+                    *self._metadata_matches({metadata_key: metadata_value})
                 )
             )
             return result.scalars().all()
         
     async def delete_by_metadata(self, metadata_key: str, metadata_value: str) -> None:
         """Delete file chunks by metadata key-value pair."""
-        session = await self.session
-        async with session as s:
-            await s.execute(
+        async with self.session() as session:
+            await session.execute(
+                delete(FileChunk).where(
+                    *self._metadata_matches({metadata_key: metadata_value})
+                )
+            )
+            await session.commit()
+
+    def _metadata_matches(self, metadata: Dict[str, Any]) -> list:
+        """
+        Build index-friendly filters for metadata key-value pairs.
+
+        Tenant and event filters use the partition key columns, the other
+        keys a JSONB containment served by the GIN index of the metadata.
+        Values are matched with their JSON type, "1" doesn't match 1.
+        """
+        conditions = [
+            getattr(FileChunk, _PARTITION_KEYS[key]) == str(value)
+            for key, value in metadata.items()
+            if key in _PARTITION_KEYS
+        ]
+        contained = {
+            key: value for key, value in metadata.items() if key not in _PARTITION_KEYS
+        }
+        if contained:
+            conditions.append(FileChunk.metadata_.contains(contained))
+        return conditions
+
+    async def ensure_partition(self, *, tenant_id: str, event_id: str) -> str:
+        """
+        Create the partitions of a tenant and event if they don't exist yet.
+
+        Creating a partition locks the whole table, so this commits on its
+        own and should run before the chunks are written, not in the same
+        transaction.
+
+        Returns:
+            The name of the partition holding the chunks of the tenant and event
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                text("SELECT data_embeddings_ensure_partition(:tenant_id, :event_id)"),
+                {"tenant_id": tenant_id, "event_id": event_id},
+            )
+            await session.commit()
+            return result.scalar_one()
+
+    async def drop_event(self, *, tenant_id: str, event_id: str) -> int:
+        """
+        Delete every chunk of an event by detaching and dropping its partition.
+
+        The partition is detached concurrently, so the tenant's other events
+        stay readable and writable meanwhile. That can't run inside a
+        transaction: it runs on its own autocommit connection and this
+        commits, so it must not be called in a transaction that already
+        touched the chunks.
+
+        Returns:
+            The number of chunks deleted
+        """
+        deleted = 0
+        if event_id:
+            engine = await init_db()
+            async with engine.connect() as connection:
+                connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+                # A detach that was interrupted is finalized, a partition
+                # detached but not dropped is only dropped
+                result = await connection.execute(
+                    text(
+                        """
+                        SELECT format('SELECT count(*) FROM %I', child.relname) AS count,
+                               CASE WHEN parent.oid IS NOT NULL THEN format(
+                                   'ALTER TABLE %I DETACH PARTITION %I %s',
+                                   parent.relname, child.relname,
+                                   CASE WHEN inherits.inhdetachpending THEN 'FINALIZE'
+                                        ELSE 'CONCURRENTLY' END
+                               ) END AS detach,
+                               format('DROP TABLE %I', child.relname) AS drop
+                        FROM pg_class child
+                        LEFT JOIN pg_inherits inherits ON inherits.inhrelid = child.oid
+                        LEFT JOIN pg_class parent ON parent.oid = inherits.inhparent
+                        WHERE child.oid = to_regclass(data_embeddings_partition_name(:tenant_id, :event_id))
+                        """
+                    ),
+                    {"tenant_id": tenant_id, "event_id": event_id},
+                )
+                partition = result.first()
+                if partition is not None:
+                    if partition.detach is not None:
+                        await connection.execute(text(partition.detach))
+                    deleted += (await connection.execute(text(partition.count))).scalar_one()
+                    await connection.execute(text(partition.drop))
+        # Chunks written before the tenant had partitions are in the default one
+        async with self.session() as session:
+            result = await session.execute(
                 delete(FileChunk).where(
-                    cast(FileChunk.metadata_.op("->>")(metadata_key), Integer) == metadata_value
+                    FileChunk.tenant_id == tenant_id, FileChunk.event_id == event_id
                 )
             )
-            await s.commit()
+            await session.commit()
+        return deleted + result.rowcount
+
+    async def delete_by_files(
+        self,
+        *,
+        metadata: Dict[str, str],
+        file_ids: Optional[List[str]] = None,
+        keep_file_ids: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Delete the chunks matching every metadata pair, optionally only those of some files.
+
+        Doesn't commit, so it can share a transaction with the inserts
+        replacing the deleted chunks.
+
+        Args:
+            metadata: metadata pairs every deleted chunk matches
+            file_ids: only delete the chunks of these files
+            keep_file_ids: don't delete the chunks of these files
+        """
+        conditions = self._metadata_matches(metadata)
+        # Served by the expression index on metadata_ ->> 'file_id'
+        file_id = FileChunk.metadata_["file_id"].as_string()
+        if file_ids is not None:
+            if not file_ids:
+                return
+            conditions.append(file_id.in_(file_ids))
+        if keep_file_ids:
+            conditions.append(or_(file_id.is_(None), file_id.notin_(keep_file_ids)))
+        async with self.session() as session:
+            await session.execute(delete(FileChunk).where(*conditions))
+
+    @staticmethod
+    def _node_row(node: BaseNode) -> Dict[str, Any]:
+        """Build the row of a node, in the same format as PGVectorStore."""
+        embedding = node.get_embedding()
+        return {
+            **partition_keys(node.metadata),
+            "text": node.get_content(metadata_mode=MetadataMode.NONE),
+            "metadata_": node_to_metadata_dict(
+                node, remove_text=True, flat_metadata=False
+            ),
+            "node_id": node.node_id,
+            "embedding": embedding,
+            # Always written, so switching to the halfvec index doesn't hide
+            # chunks; only chunks from before the column need the backfill
+            "embedding_half": embedding,
+        }
+
+    async def add_nodes(self, nodes: Sequence[BaseNode]) -> None:
+        """
+        Insert embedded nodes, in the same row format as PGVectorStore.
+
+        Batches of at least `llamaindex.bulk_insert.copy_threshold` nodes
+        are written with COPY, smaller ones with regular inserts.
+
+        Doesn't commit, so it can share a transaction with other writes.
+        """
+        if not nodes:
+            return
+        if len(nodes) >= config.get("llamaindex.bulk_insert.copy_threshold"):
+            await self.copy_nodes(nodes)
+            return
+        async with self.session() as session:
+            session.add_all([FileChunk(**self._node_row(node)) for node in nodes])
+            await session.flush()
+
+    async def copy_nodes(self, nodes: Sequence[BaseNode]) -> None:
+        """
+        Bulk insert embedded nodes with a binary COPY.
+
+        Doesn't commit, so it can share a transaction with other writes.
+        """
+        table = FileChunk.__tablename__
+        columns = [
+            "tenant_id", "event_id", "text", "metadata_", "node_id", "embedding", "embedding_half"
+        ]
+        records = [
+            (
+                row["tenant_id"],
+                row["event_id"],
+                row["text"],
+                json.dumps(row["metadata_"]),
+                row["node_id"],
+                row["embedding"],
+                row["embedding_half"],
+            )
+            for row in map(self._node_row, nodes)
+        ]
+        async with self.session() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            # Binary codec for the vector column, only while copying: the ORM
+            # sends vectors as text on the same pooled connection
+            await register_vector(driver_connection)
+            try:
+                await driver_connection.copy_records_to_table(
+                    table, records=records, columns=columns
+                )
+            finally:
+                for typename in ("vector", "halfvec", "sparsevec"):
+                    try:
+                        await driver_connection.reset_type_codec(typename)
+                    except ValueError:
+                        # Type not defined by the installed pgvector version
+                        pass
+
+    async def search(
+        self,
+        embedding: List[float],
+        *,
+        top_k: int = 5,
+        metadata: Optional[Dict[str, Any]] = None,
+        min_score: Optional[float] = None,
+        ef_search: Optional[int] = None,
+        with_embeddings: bool = False,
+    ) -> List[Row]:
+        """
+        Find the chunks most similar to an embedding, by cosine similarity.
+
+        Filters are applied during the HNSW index scan: with pgvector's
+        iterative scans the index keeps scanning until `top_k` chunks match
+        them, so selective filters still return a full top-k. Filtering on
+        `user_config_id` and `event_id` prunes the scan to their partitions.
+
+        Args:
+            embedding: The embedding vector to compare against
+            top_k: Maximum number of results to return
+            metadata: Metadata key-value pairs the chunks must match
+            min_score: Minimum similarity score (0-1) of the returned chunks
+            ef_search: Size of the HNSW candidate list, defaults to `llamaindex.hnsw.ef_search`
+            with_embeddings: Also return the embedding of the chunks
+
+        Returns:
+            Rows with the node_id, text, metadata_ and score of the chunks
+            (and embedding if requested), most similar first
+        """
+        stmt = self._search_statement(
+            embedding,
+            top_k=top_k,
+            metadata=metadata,
+            min_score=min_score,
+            with_embeddings=with_embeddings,
+        )
+        async with self.session() as session:
+            await self._set_search_settings(session, ef_search)
+            result = await session.execute(stmt)
+            return result.all()
+
+    async def explain_search(
+        self,
+        embedding: List[float],
+        *,
+        top_k: int = 5,
+        metadata: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a `search` under EXPLAIN ANALYZE, to see how much work it does.
+
+        Returns:
+            The JSON plan of the query, with actual rows and buffers
+        """
+        stmt = self._search_statement(embedding, top_k=top_k, metadata=metadata)
+        async with self.session() as session:
+            await self._set_search_settings(session, ef_search)
+            result = await session.execute(_Explain(stmt))
+            plan = result.scalar_one()
+            # Some drivers return the JSON as text
+            return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+    def _search_statement(
+        self,
+        embedding: List[float],
+        *,
+        top_k: int,
+        metadata: Optional[Dict[str, Any]] = None,
+        min_score: Optional[float] = None,
+        with_embeddings: bool = False,
+    ) -> Select:
+        columns = [FileChunk.node_id, FileChunk.text, FileChunk.metadata_]
+        if with_embeddings:
+            columns.append(FileChunk.embedding)
+        candidates = self._nearest(
+            columns,
+            embedding,
+            limit=top_k,
+            filters=self._metadata_matches(metadata or {}),
+            name="candidates",
+        )
+        stmt = select(
+            *[candidates.c[column.key] for column in columns],
+            (1 - candidates.c.distance).label("score"),
+        ).order_by(candidates.c.distance)
+        if min_score is not None:
+            stmt = stmt.where(candidates.c.distance <= 1 - min_score)
+        return stmt
+
+    def _nearest(
+        self,
+        columns: list,
+        embedding: List[float],
+        *,
+        limit: int,
+        filters: list,
+        name: str,
+    ) -> CTE:
+        """
+        Select the chunks nearest to an embedding, with their cosine distance.
+
+        With `llamaindex.quantization.index` set to `halfvec` or `bit`, the
+        index scan runs on the half-precision column or on the binary
+        quantization of the embedding. It fetches `rerank_factor` times more
+        chunks, which are re-ranked by their exact distance.
+        """
+        distance = FileChunk.embedding.cosine_distance(embedding)
+        mode = config.get("llamaindex.quantization.index")
+        if mode == "vector":
+            # Relaxed iterative scans may return rows slightly out of order,
+            # materialize them so they are sorted again
+            return (
+                select(*columns, distance.label("distance"))
+                .where(FileChunk.embedding.isnot(None), *filters)
+                .order_by(distance)
+                .limit(limit)
+                .cte(name)
+                .prefix_with("MATERIALIZED")
+            )
+
+        dimension = FileChunk.embedding.type.dim
+        if mode == "halfvec":
+            coarse_column = FileChunk.embedding_half
+            coarse_distance = FileChunk.embedding_half.cosine_distance(embedding)
+        elif mode == "bit":
+            coarse_column = FileChunk.embedding
+            query = cast(literal(embedding, Vector(dimension)), Vector(dimension))
+            coarse_distance = _binary_quantize(FileChunk.embedding, dimension).op(
+                "<~>", return_type=Float
+            )(_binary_quantize(query, dimension))
+        else:
+            raise ValueError(f"Unknown quantization index {mode}, use vector, halfvec or bit")
+
+        coarse = (
+            select(*columns, distance.label("distance"))
+            .where(coarse_column.isnot(None), *filters)
+            .order_by(coarse_distance)
+            .limit(limit * config.get("llamaindex.quantization.rerank_factor"))
+            .cte(f"{name}_coarse")
+            .prefix_with("MATERIALIZED")
+        )
+        return (
+            select(*[coarse.c[column.key] for column in columns], coarse.c.distance)
+            .order_by(coarse.c.distance)
+            .limit(limit)
+            .cte(name)
+        )
+
+    async def backfill_half_embeddings(
+        self, after: Optional[Tuple[str, str, int]] = None, batch_size: int = 1000
+    ) -> Tuple[int, Optional[Tuple[str, str, int]]]:
+        """
+        Fill the half-precision column of the next batch of chunks that don't have it.
+
+        Batches are paged by primary key, so each one starts where the last
+        one stopped instead of scanning the filled chunks again. Commits the
+        batch, so it can be called in a loop on a live table.
+
+        Args:
+            after: the key (tenant_id, event_id, id) returned by the previous batch
+            batch_size: the number of chunks per batch
+
+        Returns:
+            The number of chunks updated and the key to continue after,
+            None once no chunks are left to fill
+        """
+        dimension = FileChunk.embedding.type.dim
+        key = (FileChunk.tenant_id, FileChunk.event_id, FileChunk.id)
+        conditions = [FileChunk.embedding_half.is_(None), FileChunk.embedding.isnot(None)]
+        if after is not None:
+            conditions.append(tuple_(*key) > tuple_(*after))
+        async with self.session() as session:
+            batch = (
+                await session.execute(
+                    select(*key).where(*conditions).order_by(*key).limit(batch_size)
+                )
+            ).all()
+            if not batch:
+                return 0, None
+            first, last = tuple(batch[0]), tuple(batch[-1])
+            # Rows filled meanwhile by new writes are skipped
+            result = await session.execute(
+                update(FileChunk)
+                .where(
+                    tuple_(*key) >= tuple_(*first),
+                    tuple_(*key) <= tuple_(*last),
+                    *conditions[:2],
+                )
+                .values(embedding_half=cast(FileChunk.embedding, HALFVEC(dimension)))
+            )
+            await session.commit()
+            return result.rowcount, last
+
+    async def get_embeddings(self, metadata: Optional[Dict[str, Any]] = None) -> List[Row]:
+        """
+        Get the node_id, text and embedding of every chunk matching the metadata.
+
+        Loads them all in memory, meant for offline evaluation of a tenant.
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                select(FileChunk.node_id, FileChunk.text, FileChunk.embedding).where(
+                    FileChunk.embedding.isnot(None),
+                    *self._metadata_matches(metadata or {}),
+                )
+            )
+            return result.all()
+
+    async def hybrid_search(
+        self,
+        embedding: List[float],
+        query: str,
+        *,
+        top_k: int = 5,
+        metadata: Optional[Dict[str, Any]] = None,
+        min_score: Optional[float] = None,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: int = 60,
+        candidates: int = 50,
+        ef_search: Optional[int] = None,
+        with_embeddings: bool = False,
+    ) -> List[Row]:
+        """
+        Find chunks by both vector similarity and full-text match, in one query.
+
+        The `candidates` best chunks of each ranking are fused with weighted
+        reciprocal rank fusion: a chunk scores the sum of
+        `weight / (rrf_k + rank)` over the rankings it appears in. The
+        full-text ranking matches the query with web search syntax (all
+        words, "quoted phrases", or, -excluded), so exact names and acronyms
+        are found even when their embedding is not close. All matches are
+        ranked, unless `llamaindex.hybrid.rank_limit` caps them: the cap cuts
+        an arbitrary subset of the matches before ranking, so it trades the
+        best full-text hits of very common queries for latency.
+
+        Args:
+            embedding: The embedding of the query
+            query: The query text
+            top_k: Maximum number of results to return
+            metadata: Metadata key-value pairs the chunks must match
+            min_score: Minimum similarity score (0-1) of the chunks found by
+                the vector ranking, full-text matches are always kept
+            vector_weight: Weight of the vector ranking
+            text_weight: Weight of the full-text ranking
+            rrf_k: Rank offset of the fusion, higher values flatten the ranks
+            candidates: Number of chunks taken from each ranking
+            ef_search: Size of the HNSW candidate list, defaults to `llamaindex.hnsw.ef_search`
+            with_embeddings: Also return the embedding of the chunks
+
+        Returns:
+            Rows with the node_id, text, metadata_ and fused score of the
+            chunks (and embedding if requested), best first
+        """
+        if not re.search(r"\w", query):
+            return await self.search(
+                embedding,
+                top_k=top_k,
+                metadata=metadata,
+                min_score=min_score,
+                ef_search=ef_search,
+                with_embeddings=with_embeddings,
+            )
+
+        filters = self._metadata_matches(metadata or {})
+        key = [FileChunk.tenant_id, FileChunk.event_id, FileChunk.id]
+
+        vector = self._nearest(
+            key, embedding, limit=candidates, filters=filters, name="vector"
+        )
+        vector_ranks = select(
+            vector.c.tenant_id,
+            vector.c.event_id,
+            vector.c.id,
+            func.row_number().over(order_by=vector.c.distance).label("rank"),
+        )
+        if min_score is not None:
+            vector_ranks = vector_ranks.where(vector.c.distance <= 1 - min_score)
+        vector_ranks = vector_ranks.subquery("vector_ranks")
+
+        ts_query = func.websearch_to_tsquery(
+            cast(literal(config.get("llamaindex.hybrid.text_search_config")), REGCONFIG),
+            query,
+        )
+        matches = select(*key, FileChunk.text_search_tsv).where(
+            FileChunk.text_search_tsv.op("@@")(ts_query), *filters
+        )
+        rank_limit = config.get("llamaindex.hybrid.rank_limit")
+        if rank_limit:
+            # Unordered, it only truncates the set of matches that get ranked
+            matches = matches.limit(rank_limit)
+        matches = matches.subquery("matches")
+        text_rank = func.ts_rank_cd(matches.c.text_search_tsv, ts_query)
+        lexical_ranks = (
+            select(
+                matches.c.tenant_id,
+                matches.c.event_id,
+                matches.c.id,
+                func.row_number().over(order_by=text_rank.desc()).label("rank"),
+            )
+            .order_by(text_rank.desc())
+            .limit(candidates)
+            .subquery("lexical_ranks")
+        )
+
+        def weighted(ranks, weight: float):
+            return select(
+                ranks.c.tenant_id,
+                ranks.c.event_id,
+                ranks.c.id,
+                (cast(literal(weight), Float) / (rrf_k + ranks.c.rank)).label("score"),
+            )
+
+        scores = union_all(
+            weighted(vector_ranks, vector_weight),
+            weighted(lexical_ranks, text_weight),
+        ).subquery("scores")
+        fused = (
+            select(
+                scores.c.tenant_id,
+                scores.c.event_id,
+                scores.c.id,
+                func.sum(scores.c.score).label("score"),
+            )
+            .group_by(scores.c.tenant_id, scores.c.event_id, scores.c.id)
+            .order_by(func.sum(scores.c.score).desc())
+            .limit(top_k)
+            .subquery("fused")
+        )
+        columns = [FileChunk.node_id, FileChunk.text, FileChunk.metadata_]
+        if with_embeddings:
+            columns.append(FileChunk.embedding)
+        stmt = (
+            select(*columns, fused.c.score)
+            .join_from(
+                fused,
+                FileChunk,
+                and_(
+                    FileChunk.tenant_id == fused.c.tenant_id,
+                    FileChunk.event_id == fused.c.event_id,
+                    FileChunk.id == fused.c.id,
+                ),
+            )
+            .order_by(fused.c.score.desc())
+        )
+
+        async with self.session() as session:
+            await self._set_search_settings(session, ef_search)
+            result = await session.execute(stmt)
+            return result.all()
+
+    async def _set_search_settings(
+        self, session: AsyncSession, ef_search: Optional[int] = None
+    ) -> None:
+        """Set the HNSW scan settings, only for the current transaction (SET LOCAL)."""
+        settings = {
+            "ef_search": ef_search or config.get("llamaindex.hnsw.ef_search"),
+            "iterative_scan": config.get("llamaindex.hnsw.iterative_scan"),
+            "max_scan_tuples": config.get("llamaindex.hnsw.max_scan_tuples"),
+            "probes": config.get("llamaindex.ivfflat.probes"),
+        }
+        # One round trip for all of them
+        await session.execute(
+            text(
+                """
+                SELECT set_config('hnsw.ef_search', :ef_search, true),
+                       set_config('hnsw.iterative_scan', :iterative_scan, true),
+                       set_config('hnsw.max_scan_tuples', :max_scan_tuples, true),
+                       set_config('ivfflat.probes', :probes, true)
+                """
+            ),
+            {name: str(value) for name, value in settings.items()},
+        )
 
     async def find_similar(
         self,
         embedding: List[float],
         limit: int = 5,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> List[FileChunk]:
         """
         Find similar chunks using cosine similarity.
@@ -54,26 +678,21 @@ class FileChunkRepository(BaseRepository[FileChunk, FileChunkBase, FileChunkInDB
             embedding: The embedding vector to compare against
             limit: Maximum number of results to return
             similarity_threshold: Minimum similarity score (0-1)
+            metadata: Metadata key-value pairs the chunks must match
             
         Returns:
             List of similar FileChunks ordered by similarity
         """
-        async with self.session as session:
-            # Using cosine similarity (1 - cosine_distance)
+        rows = await self.search(
+            embedding,
+            top_k=limit,
+            metadata=metadata,
+            min_score=similarity_threshold,
+        )
+        node_ids = [row.node_id for row in rows]
+        async with self.session() as session:
             result = await session.execute(
-                select(
-                    FileChunk,
-                    (1 - func.cosine_distance(FileChunk.embedding, embedding)).label('similarity')
-                )
-                .where(FileChunk.embedding.isnot(None))
-                .order_by(func.cosine_distance(FileChunk.embedding, embedding))
-                .limit(limit)
+                select(FileChunk).where(FileChunk.node_id.in_(node_ids))
             )
-            
-            # Filter by similarity threshold and return only the chunks
-            chunks = []
-            for chunk, similarity in result:
-                if similarity >= similarity_threshold:
-                    chunks.append(chunk)
-            
-            return chunks 
\ No newline at end of file
+            chunks = {chunk.node_id: chunk for chunk in result.scalars().all()}
+        return [chunks[node_id] for node_id in node_ids if node_id in chunks]
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.models.ingestion_job import FAILED, QUEUED, RUNNING, SUCCEEDED, IngestionJob
+from app.repositories.base import BaseRepository
+from app.schemas.ingestion_job import IngestionJobCreate, IngestionJobInDB
+
+
+class IngestionJobRepository(
+    BaseRepository[IngestionJob, IngestionJobCreate, IngestionJobInDB]
+):
+    """Repository for the Postgres-backed queue of indexing jobs.
+
+    Workers claim jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so any
+    number of them can poll the same table without handing a job out twice.
+    A running job whose worker stopped sending progress updates for
+    `stale_after` seconds is handed out again, until it runs out of attempts.
+    """
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(IngestionJob, session)
+
+    async def enqueue(
+        self, *, payload: Dict[str, Any], id: Optional[UUID] = None
+    ) -> IngestionJob:
+        """Add a job to the queue, optionally with a known id."""
+        async with self.session() as session:
+            job = IngestionJob(
+                id=id or uuid4(),
+                payload=IngestionJobCreate(payload=payload).payload,
+            )
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+            return job
+
+    async def claim(
+        self, *, worker: str, stale_after: float, max_attempts: int
+    ) -> Optional[IngestionJob]:
+        """
+        Take the oldest queued job, or a job abandoned by a stopped worker.
+
+        Args:
+            worker: identifier of the claiming worker
+            stale_after: seconds without progress after which a running job is abandoned
+            max_attempts: number of times a job is handed out before it fails
+
+        Returns:
+            The claimed job, now running, or None when the queue is empty
+        """
+        stale = IngestionJob.updated_at < func.now() - timedelta(seconds=stale_after)
+        async with self.session() as session:
+            # Abandoned jobs that used all their attempts won't be picked again
+            await session.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.status == RUNNING,
+                    stale,
+                    IngestionJob.attempts >= max_attempts,
+                )
+                .values(
+                    status=FAILED,
+                    error="The worker running the job stopped responding",
+                    finished_at=func.now(),
+                )
+            )
+            result = await session.execute(
+                select(IngestionJob)
+                .where(
+                    or_(
+                        IngestionJob.status == QUEUED,
+                        and_(IngestionJob.status == RUNNING, stale),
+                    ),
+                    IngestionJob.attempts < max_attempts,
+                )
+                .order_by(IngestionJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if job is not None:
+                job.status = RUNNING
+                job.attempts += 1
+                job.worker = worker
+                job.stage = None
+                job.progress = 0.0
+                job.error = None
+                job.started_at = func.now()
+            await session.commit()
+            if job is not None:
+                await session.refresh(job)
+            return job
+
+    async def set_progress(self, id: UUID, *, stage: str, progress: float) -> None:
+        """Record the stage and progress of a running job."""
+        await self._set(id, stage=stage, progress=progress)
+
+    async def succeed(self, id: UUID, *, result: Dict[str, Any]) -> None:
+        """Mark a job as done."""
+        await self._set(
+            id,
+            status=SUCCEEDED,
+            stage="done",
+            progress=1.0,
+            result=result,
+            finished_at=func.now(),
+        )
+
+    async def fail(self, id: UUID, *, error: str, retry: bool = False) -> None:
+        """Mark a job as failed, or put it back in the queue to be tried again."""
+        if retry:
+            await self._set(id, status=QUEUED, error=error)
+        else:
+            await self._set(id, status=FAILED, error=error, finished_at=func.now())
+
+    async def heartbeat(self, id: UUID) -> None:
+        """Tell other workers that a running job is still being worked on."""
+        await self._set(id)
+
+    async def _set(self, id: UUID, **values: Any) -> None:
+        async with self.session() as session:
+            await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == id)
+                .values(**values, updated_at=func.now())
+            )
+            await session.commit()
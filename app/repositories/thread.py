@@ -2,16 +2,23 @@ from uuid import UUID
 from typing import Optional, Dict, List
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.thread import Thread
 from app.repositories.base import BaseRepository
-from app.schemas.thread import ThreadCreate, ThreadUpdate
+from app.repositories.cache import RepositoryCache
+from app.schemas.thread import Thread as ThreadSchema, ThreadCreate, ThreadUpdate
+
+thread_cache = RepositoryCache("threads")
 
 class ThreadRepository(BaseRepository[Thread, ThreadCreate, ThreadUpdate]):
     """Repository for Thread operations."""
 
-    def __init__(self):
-        super().__init__(Thread)
+    cache = thread_cache
+    cache_schema = ThreadSchema
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(Thread, session)
 
     async def create_with_config(
         self, *, user_config_id: UUID = None,
@@ -26,7 +33,7 @@ class ThreadRepository(BaseRepository[Thread, ThreadCreate, ThreadUpdate]):
 
     async def get_by_id(self, thread_id: UUID) -> Optional[Thread]:
         """Get a thread by its ID with its relationships loaded."""
-        async with await self.session as session:
+        async with self.session() as session:
             result = await session.execute(
                 select(Thread)
                 .options(selectinload(Thread.user_config))
@@ -36,7 +43,7 @@ class ThreadRepository(BaseRepository[Thread, ThreadCreate, ThreadUpdate]):
 
     async def get_by_config(self, user_config_id: UUID) -> List[Thread]:
         """Get all threads for a specific user config."""
-        async with await self.session as session:
+        async with self.session() as session:
             result = await session.execute(
                 select(Thread)
                 .options(selectinload(Thread.user_config))
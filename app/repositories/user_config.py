@@ -1,16 +1,27 @@
 from typing import Dict, Optional, List, Any
 from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user_config import UserConfig
 from app.repositories.base import BaseRepository
-from app.schemas.user_config import UserConfigCreate, UserConfigUpdate
+from app.repositories.cache import RepositoryCache
+from app.schemas.user_config import (
+    UserConfig as UserConfigSchema,
+    UserConfigCreate,
+    UserConfigUpdate,
+)
+
+user_config_cache = RepositoryCache("user_configs")
 
 
 class UserConfigRepository(BaseRepository[UserConfig, UserConfigCreate, UserConfigUpdate]):
     """Repository for UserConfig operations."""
 
-    def __init__(self):
-        super().__init__(UserConfig)
+    cache = user_config_cache
+    cache_schema = UserConfigSchema
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        super().__init__(UserConfig, session)
 
     async def create_with_config(
         self, *, config: Dict[str, Any], description: Optional[str] = None, active: bool = True
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DocumentManifestBase(BaseModel):
+    """Base schema for DocumentManifest."""
+    user_config_id: str
+    event_id: str
+    file_id: str
+    content_hash: str
+    chunks: int = 0
+
+
+class DocumentManifestCreate(DocumentManifestBase):
+    """Schema for creating a new DocumentManifest entry."""
+    pass
+
+
+class DocumentManifestInDB(DocumentManifestBase):
+    """Schema for DocumentManifest as stored in database."""
+    indexed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,23 @@
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+class EmbeddingCacheBase(BaseModel):
+    """Base schema for EmbeddingCache."""
+    kind: str
+    content_hash: str
+    model: str
+    dimension: int
+    embedding: List[float]
+
+
+class EmbeddingCacheCreate(EmbeddingCacheBase):
+    """Schema for creating a new EmbeddingCache entry."""
+    pass
+
+
+class EmbeddingCacheInDB(EmbeddingCacheBase):
+    """Schema for EmbeddingCache as stored in database."""
+
+    model_config = ConfigDict(from_attributes=True)
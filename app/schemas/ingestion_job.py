@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class IngestionJobBase(BaseModel):
+    """Base schema for IngestionJob."""
+    payload: Dict[str, Any]
+
+
+class IngestionJobCreate(IngestionJobBase):
+    """Schema for creating a new IngestionJob."""
+    pass
+
+
+class IngestionJobInDB(IngestionJobBase):
+    """Schema for IngestionJob as stored in database."""
+    id: UUID
+    status: str
+    stage: Optional[str] = None
+    progress: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    worker: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class IngestionJob(BaseModel):
+    """Schema for IngestionJob as returned to client."""
+    id: UUID
+    status: str
+    stage: Optional[str] = None
+    progress: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
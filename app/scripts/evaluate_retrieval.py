@@ -0,0 +1,237 @@
+"""Measure retrieval recall and latency against exact search.
+
+Every configuration is compared with an exact brute-force top-k computed
+with NumPy over the tenant's vectors. To run it locally without provider
+calls, index and evaluate with the deterministic fake embedding model
+against a pgvector container:
+
+    LLM_PROVIDER=fake index_documents data/ --user_config_id <id>
+    LLM_PROVIDER=fake evaluate_retrieval --user-config-id <id> --ef-search 20 40 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config.app import config
+from app.db.base import close_db
+from app.repositories.file_chunk import FileChunkRepository
+from app.services.embedding_cache import query_embedding_cache
+from app.services.vector_store import SearchSettings, get_vector_store_service
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare retrieval recall and latency with exact search"
+    )
+    parser.add_argument("--user-config-id", required=True, help="Tenant to evaluate")
+    parser.add_argument("--event-id", help="Only evaluate the chunks of this event")
+    parser.add_argument(
+        "--queries", help="File with one query per line, instead of sampled chunks"
+    )
+    parser.add_argument(
+        "--sample", type=int, default=100, help="Number of chunks sampled as queries"
+    )
+    parser.add_argument(
+        "--query-words",
+        type=int,
+        default=12,
+        help="Words of a sampled chunk used as its query",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the query sample")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--ef-search",
+        type=int,
+        nargs="+",
+        default=[config.get("llamaindex.hnsw.ef_search")],
+        help="HNSW ef_search values to evaluate",
+    )
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="Also evaluate hybrid search, which isn't expected to match exact vector search",
+    )
+    parser.add_argument(
+        "--explain",
+        type=int,
+        default=20,
+        help="Queries run under EXPLAIN ANALYZE per configuration, to count rows scanned",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    return parser.parse_args()
+
+
+def _sample_queries(rows: List[Any], n: int, words: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    sample = rng.sample(rows, min(n, len(rows)))
+    return [" ".join(row.text.split()[:words]) for row in sample]
+
+
+def _exact_top_k(
+    matrix: np.ndarray, node_ids: List[str], embedding: List[float], k: int
+) -> Set[str]:
+    query = np.asarray(embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    similarities = matrix @ query
+    k = min(k, len(node_ids))
+    top = np.argpartition(-similarities, k - 1)[:k]
+    return {node_ids[i] for i in top}
+
+
+def _plan_work(plan: Dict[str, Any]) -> Dict[str, int]:
+    """Rows read by the scans of a plan and its shared buffers."""
+    rows = 0
+    nodes = [plan["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if "Scan" in node["Node Type"] and "Relation Name" in node:
+            read = node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)
+            rows += read * node.get("Actual Loops", 1)
+    top = plan["Plan"]
+    return {
+        "rows": rows,
+        "buffers": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+    }
+
+
+async def _evaluate(
+    name: str,
+    settings: SearchSettings,
+    queries: List[str],
+    embeddings: List[List[float]],
+    exact: List[Set[str]],
+    metadata: Dict[str, str],
+    top_k: int,
+    explain: int,
+) -> Dict[str, Any]:
+    service = get_vector_store_service()
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, exact):
+        start = time.perf_counter()
+        nodes = await service.aretrieve(
+            query, top_k=top_k, metadata=metadata, settings=settings
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {node.node.node_id for node in nodes}
+        recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+
+    rows_scanned: Optional[float] = None
+    buffers: Optional[float] = None
+    if explain and not settings.hybrid:
+        work = [
+            _plan_work(
+                await FileChunkRepository().explain_search(
+                    embedding, top_k=top_k, metadata=metadata, ef_search=settings.ef_search
+                )
+            )
+            for embedding in embeddings[:explain]
+        ]
+        rows_scanned = float(np.mean([w["rows"] for w in work]))
+        buffers = float(np.mean([w["buffers"] for w in work]))
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "configuration": name,
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "rows_scanned": rows_scanned,
+        "buffers": buffers,
+    }
+
+
+async def main():
+    args = parse_args()
+    metadata = {"user_config_id": args.user_config_id}
+    if args.event_id:
+        metadata["event_id"] = args.event_id
+
+    try:
+        service = get_vector_store_service()
+        rows = await FileChunkRepository().get_embeddings(metadata)
+        if not rows:
+            print("No chunks found for this tenant")
+            return
+        node_ids = [row.node_id for row in rows]
+        matrix = np.asarray([row.embedding for row in rows], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        if args.queries:
+            with open(args.queries) as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            queries = _sample_queries(rows, args.sample, args.query_words, args.seed)
+
+        # Embedded up front, so latencies only measure the retrieval
+        embeddings = [
+            await query_embedding_cache.aget_query_embedding(query, service.embed_model)
+            for query in queries
+        ]
+        exact = [
+            _exact_top_k(matrix, node_ids, embedding, args.top_k) for embedding in embeddings
+        ]
+        print(f"{len(queries)} queries over {len(rows)} chunks, recall@{args.top_k}")
+
+        configurations = []
+        for ef_search in args.ef_search:
+            overrides = {"hybrid": False, "mmr": False, "ef_search": ef_search}
+            configurations.append((f"vector ef_search={ef_search}", overrides))
+            if args.hybrid:
+                configurations.append(
+                    (f"hybrid ef_search={ef_search}", {**overrides, "hybrid": True})
+                )
+
+        results = []
+        for name, overrides in configurations:
+            result = await _evaluate(
+                name,
+                SearchSettings.for_tenant(overrides),
+                queries,
+                embeddings,
+                exact,
+                metadata,
+                args.top_k,
+                args.explain,
+            )
+            results.append(result)
+            rows_scanned = (
+                f"{result['rows_scanned']:.0f} rows, {result['buffers']:.0f} buffers"
+                if result["rows_scanned"] is not None
+                else "-"
+            )
+            print(
+                f"{name:<28} recall {result['recall']:.3f}  "
+                f"p50 {result['p50_ms']:.1f}ms  p95 {result['p95_ms']:.1f}ms  "
+                f"p99 {result['p99_ms']:.1f}ms  scanned {rows_scanned}"
+            )
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(
+                    {
+                        "user_config_id": args.user_config_id,
+                        "event_id": args.event_id,
+                        "queries": len(queries),
+                        "chunks": len(rows),
+                        "top_k": args.top_k,
+                        "seed": args.seed,
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+    finally:
+        await close_db()
+
+
+def cli():
+    asyncio.run(main())
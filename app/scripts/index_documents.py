@@ -23,6 +23,11 @@ async def main():
     
     # Add required directory path argument
     parser.add_argument('directory', help='Directory path containing documents to index')
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only index the files that changed since the last run of the event (requires --event_id)'
+    )
     
     # Parse known args first to get any custom metadata parameters
     args, remaining = parser.parse_known_args()
@@ -49,8 +54,21 @@ async def main():
             if value is not None:
                 metadata[arg] = value
         
-        await index_file_documents(dir_path=args.directory, metadata=metadata)
+        report = await index_file_documents(
+            dir_path=args.directory, metadata=metadata, incremental=args.incremental
+        )
         print("Successfully indexed documents")
+        print(report)
+        for label, file_ids in [
+            ("Added", report.added),
+            ("Updated", report.updated),
+            ("Removed", report.removed),
+        ]:
+            for file_id in file_ids:
+                print(f"  {label}: {file_id}")
+        print("Slowest files to parse:")
+        for file_id, seconds in report.slowest_files(5):
+            print(f"  {seconds:.1f}s: {file_id}")
         if metadata:
             print(f"With metadata: {metadata}")
     except Exception as e:
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Optional
+
+from app.config.app import config
+from app.db.base import close_db
+from app.services.ingestion import run_worker
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Run index workers processing the ingestion job queue"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes to run",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        help="Seconds to wait when the queue is empty",
+    )
+    return parser.parse_args()
+
+
+async def main(poll_interval: Optional[float] = None):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Finish the current job before stopping
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await run_worker(
+            f"{socket.gethostname()}:{os.getpid()}", stop, poll_interval=poll_interval
+        )
+    finally:
+        await close_db()
+
+
+def run_process(poll_interval: Optional[float] = None):
+    logging.basicConfig(level=config.get("app.log_level").upper())
+    asyncio.run(main(poll_interval))
+
+
+def cli():
+    args = parse_args()
+    if args.processes <= 1:
+        run_process(args.poll_interval)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_process,
+            args=(args.poll_interval,),
+            name=f"index-worker-{i}",
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    # Ctrl+C already reaches every process of the group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop)
+    for process in processes:
+        process.join()
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.embedding_cache import EmbeddingCacheRepository
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Manage the embedding cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Show the cached entries by kind and model")
+
+    prune = subparsers.add_parser("prune", help="Delete cached embeddings")
+    prune.add_argument(
+        "--unused-days",
+        type=int,
+        help="Only delete entries not used in this number of days",
+    )
+    prune.add_argument("--kind", choices=["query", "text"], help="Only delete this kind")
+    prune.add_argument("--model", type=str, help="Only delete entries of this model")
+    prune.add_argument(
+        "--all", action="store_true", help="Delete every entry, needed without filters"
+    )
+
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if (
+        args.command == "prune"
+        and not args.all
+        and args.unused_days is None
+        and args.kind is None
+        and args.model is None
+    ):
+        raise SystemExit("Pass --unused-days, --kind or --model, or --all to empty the cache")
+    repository = EmbeddingCacheRepository()
+
+    if args.command == "stats":
+        rows = await repository.stats()
+        if not rows:
+            print("The embedding cache is empty")
+        for row in rows:
+            print(
+                f"{row['kind']:<6} {row['model']} ({row['dimension']}): "
+                f"{row['entries']} entries, oldest {row['oldest']:%Y-%m-%d}, "
+                f"last used {row['last_used']:%Y-%m-%d %H:%M}"
+            )
+    elif args.command == "prune":
+        unused_since = None
+        if args.unused_days is not None:
+            unused_since = datetime.now(timezone.utc) - timedelta(days=args.unused_days)
+        deleted = await repository.prune(
+            unused_since=unused_since, kind=args.kind, model=args.model, all=args.all
+        )
+        print(f"Deleted {deleted} cached embeddings")
+
+
+def cli():
+    asyncio.run(main())
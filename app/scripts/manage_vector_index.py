@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+
+from app.db.base import close_db
+from app.repositories.file_chunk import FileChunkRepository
+from app.services.vector_index import METHODS, QUANTIZATIONS, VectorIndexManager
+
+
+def _size(size: int) -> str:
+    for unit in ["B", "kB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Manage the vector indexes of the chunk table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Show the vector indexes with their size")
+    subparsers.add_parser("progress", help="Show the index builds in progress")
+
+    build = subparsers.add_parser(
+        "build", help="Create or rebuild a vector index without blocking writes"
+    )
+    build.add_argument("--method", choices=METHODS, default="hnsw")
+    build.add_argument("--name", type=str, help="Index name, defaults to ix_data_embeddings_<column>_<method>")
+    build.add_argument("--m", type=int, help="HNSW connections per node")
+    build.add_argument("--ef-construction", type=int, help="HNSW build candidate list")
+    build.add_argument("--lists", type=int, help="IVFFlat lists")
+    build.add_argument("--ops", type=str, help="Operator class, e.g. vector_cosine_ops")
+    build.add_argument(
+        "--quantization",
+        choices=QUANTIZATIONS,
+        default="vector",
+        help="Index full vectors, the half-precision column or binary quantized vectors",
+    )
+    build.add_argument(
+        "--replace", action="store_true", help="Rebuild the index if it already exists"
+    )
+    build.add_argument(
+        "--maintenance-work-mem", type=str, help="Memory for the build, e.g. 2GB"
+    )
+
+    backfill = subparsers.add_parser(
+        "backfill-halfvec",
+        help="Fill the half-precision column of the chunks written before it was enabled",
+    )
+    backfill.add_argument("--batch-size", type=int, default=1000)
+
+    drop = subparsers.add_parser("drop", help="Drop a vector index")
+    drop.add_argument("name", type=str)
+
+    prewarm = subparsers.add_parser(
+        "prewarm", help="Load a vector index into shared buffers"
+    )
+    prewarm.add_argument("name", type=str, nargs="?", default="ix_data_embeddings_embedding_hnsw")
+
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    manager = VectorIndexManager()
+
+    try:
+        if args.command == "list":
+            indexes = await manager.list_indexes()
+            if not indexes:
+                print("The chunk table has no vector indexes")
+            for index in indexes:
+                state = "valid" if index["valid"] else "INVALID"
+                print(
+                    f"{index['name']} ({state}): {_size(index['size'])} "
+                    f"over {index['partitions']} partitions"
+                )
+                print(f"  {index['definition']}")
+        elif args.command == "progress":
+            builds = await manager.progress()
+            if not builds:
+                print("No index builds in progress")
+            for build in builds:
+                blocks = f"{build['blocks_done']}/{build['blocks_total']} blocks"
+                tuples = f"{build['tuples_done']}/{build['tuples_total']} tuples"
+                print(f"{build['index']} on {build['partition']}: {build['phase']}, {blocks}, {tuples}")
+        elif args.command == "build":
+            def progress(done: int, total: int, partition: str) -> None:
+                print(f"[{done}/{total}] {partition or 'done'}")
+
+            name = await manager.build(
+                method=args.method,
+                name=args.name,
+                m=args.m,
+                ef_construction=args.ef_construction,
+                lists=args.lists,
+                ops=args.ops,
+                quantization=args.quantization,
+                replace=args.replace,
+                maintenance_work_mem=args.maintenance_work_mem,
+                progress=progress,
+            )
+            print(f"Built {name}")
+        elif args.command == "backfill-halfvec":
+            repository = FileChunkRepository()
+            total = 0
+            updated, after = await repository.backfill_half_embeddings(
+                batch_size=args.batch_size
+            )
+            while after is not None:
+                total += updated
+                print(f"Backfilled {total} chunks")
+                updated, after = await repository.backfill_half_embeddings(
+                    after, batch_size=args.batch_size
+                )
+            print(f"Done, {total} chunks backfilled")
+        elif args.command == "drop":
+            await manager.drop(args.name)
+            print(f"Dropped {args.name}")
+        elif args.command == "prewarm":
+            blocks = await manager.prewarm(args.name)
+            print(f"Loaded {blocks} blocks of {args.name} into shared buffers")
+    finally:
+        await close_db()
+
+
+def cli():
+    asyncio.run(main())
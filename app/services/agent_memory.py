@@ -0,0 +1,85 @@
+import asyncio
+from typing import Optional
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.config.app import config
+
+
+class AgentMemory:
+    """Process-wide Postgres checkpointer shared by every agent graph.
+
+    The checkpointer is backed by a connection pool, so chat messages borrow
+    an open connection instead of connecting to Postgres each time. The
+    checkpoint schema migrations (`setup()`) run once when the memory is
+    started instead of on every chat message.
+    """
+
+    def __init__(self):
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._checkpointer: Optional[AsyncPostgresSaver] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> AsyncPostgresSaver:
+        """Open the connection pool and run the checkpoint migrations."""
+        async with self._lock:
+            if self._checkpointer is not None:
+                return self._checkpointer
+
+            connection_string = config.get("llm.memory.async_database_url")
+            if not connection_string:
+                raise Exception(
+                    "No connection string set for agent memory. Please add LLM_MEMORY_ASYNC_DATABASE_URL to .env"
+                )
+            statement_timeout = config.get("llm.memory.statement_timeout")
+            self._pool = AsyncConnectionPool(
+                connection_string,
+                min_size=config.get("llm.memory.pool.min_size"),
+                max_size=config.get("llm.memory.pool.max_size"),
+                max_idle=config.get("llm.memory.pool.max_idle"),
+                timeout=config.get("llm.memory.pool.timeout"),
+                kwargs={
+                    "autocommit": True,
+                    "prepare_threshold": 0,
+                    "row_factory": dict_row,
+                    "options": f"-c statement_timeout={statement_timeout}",
+                },
+                name="agent-memory",
+                open=False,
+            )
+            await self._pool.open(wait=True)
+            checkpointer = AsyncPostgresSaver(self._pool)
+            await checkpointer.setup()
+            self._checkpointer = checkpointer
+            return checkpointer
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._pool is not None:
+                await self._pool.close()
+            self._pool = None
+            self._checkpointer = None
+
+    async def get_checkpointer(self) -> AsyncPostgresSaver:
+        """Get the shared checkpointer, starting it if needed."""
+        if self._checkpointer is None:
+            return await self.start()
+        return self._checkpointer
+
+    def stats(self) -> dict:
+        """Return the connection pool usage and saturation counters."""
+        if self._pool is None:
+            return {}
+        stats = self._pool.get_stats()
+        in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+        return {
+            **stats,
+            "min_size": self._pool.min_size,
+            "max_size": self._pool.max_size,
+            "in_use": in_use,
+            "saturation": in_use / self._pool.max_size,
+        }
+
+agent_memory = AgentMemory()
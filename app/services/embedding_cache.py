@@ -0,0 +1,134 @@
+import hashlib
+import logging
+from typing import List, Optional
+
+from cachetools import TTLCache
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from app.config.app import config
+from app.config.llamaindex import get_embedding_model_info
+from app.repositories.embedding_cache import EmbeddingCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Get the sha256 hex digest used as embedding cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize whitespace so equivalent queries share a cache key.
+
+    Case is kept, embedding models can tell "US" from "us".
+    """
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """Two-tier cache of query embeddings.
+
+    Keyed by (embedding model, dimension, normalized query), while the
+    query itself is what gets embedded. An in-memory
+    TTL/LRU tier sits in front of an optional Postgres tier shared by every
+    process, so repeated queries skip the call to the embedding provider.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        persistent: Optional[bool] = None,
+    ):
+        self._memory = TTLCache(
+            maxsize=maxsize or config.get("llamaindex.embedding_cache.query.maxsize"),
+            ttl=ttl or config.get("llamaindex.embedding_cache.query.ttl"),
+        )
+        self._persistent = (
+            persistent
+            if persistent is not None
+            else config.get("llamaindex.embedding_cache.query.persistent")
+        )
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    async def aget_query_embedding(
+        self, query: str, embed_model: BaseEmbedding
+    ) -> List[float]:
+        """
+        Get the embedding of a query, calling the embedding model on cache misses.
+
+        Args:
+            query: the query text
+            embed_model: the model used to embed the query on a miss
+
+        Returns:
+            The query embedding
+        """
+        model, dimension = get_embedding_model_info()
+        text = normalize_query(query)
+        key = (model, dimension, text)
+
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            self.hits += 1
+            return embedding
+
+        if self._persistent:
+            embedding = await self._get_persistent(model, dimension, text)
+            if embedding is not None:
+                self.persistent_hits += 1
+
+        if embedding is None:
+            self.misses += 1
+            embedding = await embed_model.aget_query_embedding(query)
+            if self._persistent:
+                await self._put_persistent(model, dimension, text, embedding)
+
+        self._memory[key] = embedding
+        return embedding
+
+    async def _get_persistent(
+        self, model: str, dimension: int, text: str
+    ) -> Optional[List[float]]:
+        key = content_hash(text)
+        try:
+            found = await EmbeddingCacheRepository().get_many(
+                kind="query", model=model, dimension=dimension, content_hashes=[key]
+            )
+            return found.get(key)
+        except Exception as e:
+            # The persistent tier is an optimization, never fail a search on it
+            logger.warning(f"Failed to read the query embedding cache: {e}")
+            return None
+
+    async def _put_persistent(
+        self, model: str, dimension: int, text: str, embedding: List[float]
+    ) -> None:
+        try:
+            await EmbeddingCacheRepository().put_many(
+                kind="query",
+                model=model,
+                dimension=dimension,
+                embeddings={content_hash(text): embedding},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write the query embedding cache: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.persistent_hits + self.misses
+        return {
+            "size": self._memory.currsize,
+            "maxsize": self._memory.maxsize,
+            "ttl": self._memory.ttl,
+            "persistent": self._persistent,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.persistent_hits) / total if total else 0.0,
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from app.config.app import config
+from app.core.llamaindex.indexer import index_file_documents
+from app.models.ingestion_job import IngestionJob
+from app.repositories.ingestion_job import IngestionJobRepository
+
+logger = logging.getLogger(__name__)
+
+
+def get_upload_dir(job_id: UUID) -> Path:
+    """Get the directory holding the files of an ingestion job."""
+    return Path(config.get("ingestion.upload_dir"), str(job_id))
+
+
+async def _heartbeat(repository: IngestionJobRepository, job_id: UUID) -> None:
+    interval = config.get("ingestion.stale_after") / 4
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await repository.heartbeat(job_id)
+        except Exception as e:
+            logger.warning(f"Could not send heartbeat of ingestion job {job_id}: {e}")
+
+
+async def process_job(job: IngestionJob, repository: IngestionJobRepository) -> None:
+    """
+    Index the uploaded files of a claimed job and record the outcome.
+
+    Failed jobs are queued again until they run out of attempts. The upload
+    directory is removed once the job is done for good.
+    """
+    upload_dir = get_upload_dir(job.id)
+    payload = job.payload
+
+    async def progress(stage: str, value: float) -> None:
+        await repository.set_progress(job.id, stage=stage, progress=value)
+
+    heartbeat = asyncio.create_task(_heartbeat(repository, job.id))
+    try:
+        if not upload_dir.is_dir():
+            raise FileNotFoundError(f"Upload directory not found: {upload_dir}")
+        report = await index_file_documents(
+            dir_path=str(upload_dir),
+            metadata=payload.get("metadata", {}),
+            incremental=payload.get("incremental", False),
+            progress=progress,
+        )
+    except Exception as e:
+        logger.exception(f"Ingestion job {job.id} failed (attempt {job.attempts})")
+        retry = job.attempts < config.get("ingestion.max_attempts")
+        await repository.fail(job.id, error=str(e), retry=retry)
+        if not retry:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+        return
+    finally:
+        heartbeat.cancel()
+
+    await repository.succeed(job.id, result=report.to_dict())
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    logger.info(f"Ingestion job {job.id} done: {report}")
+
+
+async def run_worker(
+    worker: str,
+    stop: asyncio.Event,
+    poll_interval: Optional[float] = None,
+) -> None:
+    """
+    Claim and process ingestion jobs until `stop` is set.
+
+    Args:
+        worker: identifier of the worker, recorded on the jobs it claims
+        stop: set to stop after the current job
+        poll_interval: seconds to wait when the queue is empty
+    """
+    repository = IngestionJobRepository()
+    poll_interval = poll_interval or config.get("ingestion.poll_interval")
+
+    logger.info(f"Index worker {worker} started")
+    while not stop.is_set():
+        try:
+            job = await repository.claim(
+                worker=worker,
+                stale_after=config.get("ingestion.stale_after"),
+                max_attempts=config.get("ingestion.max_attempts"),
+            )
+        except Exception as e:
+            logger.error(f"Could not claim an ingestion job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"Index worker {worker} claimed ingestion job {job.id}")
+        await process_job(job, repository)
+    logger.info(f"Index worker {worker} stopped")
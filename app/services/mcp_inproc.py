@@ -0,0 +1,76 @@
+import asyncio
+import importlib.util
+import json
+import os
+from pathlib import Path
+from typing import Any, List
+
+import pydantic_core
+from langchain_core.tools import BaseTool, StructuredTool
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.tools import Tool
+
+
+def load_server(server_name: str, connection: dict) -> FastMCP:
+    """
+    Import a first-party FastMCP server module into the current process.
+
+    Args:
+        server_name: name of the server in config/mcp/config.json
+        connection: the server config; `path` points to the module file and
+            the optional `server` key names the FastMCP instance (default `mcp`)
+
+    Returns:
+        The FastMCP instance defined by the module
+    """
+    if "path" not in connection:
+        raise ValueError(f"MCP server '{server_name}' needs a 'path' for inproc transport")
+
+    path = Path(os.getcwd(), connection["path"])
+    module_name = f"app.core.mcp.{path.stem.replace('-', '_')}"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise FileNotFoundError(f"MCP server module not found: {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    server = getattr(module, connection.get("server", "mcp"), None)
+    if not isinstance(server, FastMCP):
+        raise TypeError(f"{path} does not define a FastMCP server")
+    return server
+
+
+def _to_content(result: Any) -> str:
+    """Serialize a tool result the same way FastMCP does over the wire."""
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(pydantic_core.to_jsonable_python(result))
+    except Exception:
+        return str(result)
+
+
+def _to_langchain_tool(tool: Tool) -> BaseTool:
+    async def call_tool(**arguments: Any) -> str:
+        parsed = tool.fn_metadata.arg_model.model_validate(
+            arguments
+        ).model_dump_one_level()
+        if tool.is_async:
+            result = await tool.fn(**parsed)
+        else:
+            # Sync tools do blocking I/O, keep them off the event loop
+            result = await asyncio.to_thread(tool.fn, **parsed)
+        return _to_content(result)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.parameters,
+        coroutine=call_tool,
+    )
+
+
+def load_inproc_tools(server_name: str, connection: dict) -> List[BaseTool]:
+    """Load the tools of a FastMCP server as native async LangChain tools."""
+    server = load_server(server_name, connection)
+    return [_to_langchain_tool(tool) for tool in server._tool_manager.list_tools()]
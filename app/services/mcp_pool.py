@@ -0,0 +1,386 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp import ClientSession
+
+from app.config.app import config
+from app.config.mcp import load_config
+from app.services.mcp_inproc import load_inproc_tools
+
+logger = logging.getLogger(__name__)
+
+# Tools of the sessions borrowed by the current request, by tool name
+_leased_tools: ContextVar[Optional[Dict[str, BaseTool]]] = ContextVar(
+    "mcp_leased_tools", default=None
+)
+
+
+def _proxy_tool(tool: BaseTool) -> BaseTool:
+    """
+    Build a session-independent copy of an MCP tool.
+
+    The proxy keeps the tool's name and schema but forwards each call to the
+    same tool of the session borrowed by the current request, so it can be
+    bound into a graph that outlives any single session.
+    """
+
+    async def call_tool(**arguments: Any) -> Any:
+        leased = _leased_tools.get()
+        if not leased or tool.name not in leased:
+            raise RuntimeError(
+                f"Tool '{tool.name}' was called without a borrowed MCP session"
+            )
+        return await leased[tool.name].coroutine(**arguments)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=call_tool,
+        response_format=tool.response_format,
+    )
+
+
+class MCPSession:
+    """A long-lived connection to a single MCP server.
+
+    The connection is owned by a dedicated task so the transport context
+    managers are entered and exited from the same task, as the stdio
+    transport requires.
+    """
+
+    def __init__(self, server_name: str, connection: dict):
+        self.server_name = server_name
+        self._connection = connection
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[Exception] = None
+        self.session: Optional[ClientSession] = None
+        self.tools: List[BaseTool] = []
+
+    @property
+    def alive(self) -> bool:
+        """Whether the server process and its session are still running."""
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self.session is not None
+        )
+
+    async def start(self, timeout: float) -> None:
+        """Launch the server and wait until its tools are loaded."""
+        self._task = asyncio.create_task(
+            self._run(), name=f"mcp-session:{self.server_name}"
+        )
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            raise
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            async with MultiServerMCPClient(
+                {self.server_name: self._connection}
+            ) as client:
+                self.session = client.sessions[self.server_name]
+                self.tools = client.get_tools()
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP server '{self.server_name}' stopped: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout: float) -> bool:
+        """Check that the server still answers requests."""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"MCP server '{self.server_name}' failed ping: {e}")
+            return False
+
+    async def stop(self, timeout: float) -> None:
+        """Ask the owning task to close the session and wait for it."""
+        self._closing.set()
+        if self._task is None or self._task.done():
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except Exception as e:
+            logger.warning(f"MCP server '{self.server_name}' did not stop cleanly: {e}")
+
+
+class MCPSessionPool:
+    """Process-wide pool of MCP sessions keyed by server name.
+
+    Each configured server gets a fixed number of sessions that are started
+    once and lent out to requests, so chat messages no longer spawn a new
+    server process per call. Dead sessions are restarted when they are
+    borrowed or when the periodic health check finds them.
+
+    Servers using the `inproc` transport run inside this process; their
+    tools are loaded once and shared by every request.
+
+    `get_tools` returns tools that stay valid across sessions: calls made
+    through them are routed to the sessions borrowed with `acquire`.
+    """
+
+    def __init__(
+        self,
+        connections: Optional[Dict[str, dict]] = None,
+        size: Optional[int] = None,
+        health_check_interval: Optional[float] = None,
+        acquire_timeout: Optional[float] = None,
+        start_timeout: Optional[float] = None,
+    ):
+        self._connections = connections
+        self._size = size
+        self._health_check_interval = health_check_interval
+        self._acquire_timeout = acquire_timeout
+        self._start_timeout = start_timeout
+        self._slots: Dict[str, List[MCPSession]] = {}
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._inproc_tools: Dict[str, List[BaseTool]] = {}
+        self._proxy_tools: Dict[str, List[BaseTool]] = {}
+        self._restarts: Dict[str, int] = defaultdict(int)
+        self._health_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def _configured_connections(self) -> Dict[str, dict]:
+        if self._connections is not None:
+            return self._connections
+        all_mcp_configs = load_config()
+        return {
+            name: all_mcp_configs[name] for name in config.get("llm.mcp.servers")
+        }
+
+    async def start(self) -> None:
+        """Start every session of every configured server."""
+        async with self._lock:
+            if self._started:
+                return
+
+            self._size = self._size or config.get("llm.mcp.pool.size")
+            self._health_check_interval = self._health_check_interval or config.get(
+                "llm.mcp.pool.health_check_interval"
+            )
+            self._acquire_timeout = self._acquire_timeout or config.get(
+                "llm.mcp.pool.acquire_timeout"
+            )
+            self._start_timeout = self._start_timeout or config.get(
+                "llm.mcp.pool.start_timeout"
+            )
+
+            for name, connection in self._configured_connections().items():
+                if connection.get("transport") == "inproc":
+                    self._inproc_tools[name] = load_inproc_tools(name, connection)
+                    continue
+                self._slots[name] = [
+                    MCPSession(name, connection) for _ in range(self._size)
+                ]
+                self._idle[name] = asyncio.Queue()
+
+            slots = [slot for slots in self._slots.values() for slot in slots]
+            results = await asyncio.gather(
+                *[slot.start(self._start_timeout) for slot in slots],
+                return_exceptions=True,
+            )
+            for slot, result in zip(slots, results):
+                if isinstance(result, Exception):
+                    # Keep the slot, it will be restarted on borrow or health check
+                    logger.error(
+                        f"Could not start MCP server '{slot.server_name}': {result}"
+                    )
+                else:
+                    self._register_tools(slot)
+                self._idle[slot.server_name].put_nowait(slot)
+
+            if self._health_check_interval > 0:
+                self._health_task = asyncio.create_task(
+                    self._health_check(), name="mcp-pool-health-check"
+                )
+            self._started = True
+
+    async def close(self) -> None:
+        """Stop the health check and every session."""
+        async with self._lock:
+            if not self._started:
+                return
+            if self._health_task is not None:
+                self._health_task.cancel()
+                self._health_task = None
+            await asyncio.gather(
+                *[
+                    slot.stop(self._start_timeout)
+                    for slots in self._slots.values()
+                    for slot in slots
+                ]
+            )
+            self._slots = {}
+            self._idle = {}
+            self._inproc_tools = {}
+            self._proxy_tools = {}
+            self._started = False
+
+    def _register_tools(self, slot: MCPSession) -> None:
+        if slot.server_name not in self._proxy_tools:
+            self._proxy_tools[slot.server_name] = [
+                _proxy_tool(tool) for tool in slot.tools
+            ]
+
+    async def _restart(self, slot: MCPSession) -> MCPSession:
+        """Replace a dead session with a freshly started one."""
+        name = slot.server_name
+        logger.info(f"Restarting MCP server '{name}'")
+        await slot.stop(self._start_timeout)
+        new_slot = MCPSession(name, slot._connection)
+        await new_slot.start(self._start_timeout)
+        self._register_tools(new_slot)
+        slots = self._slots[name]
+        slots[slots.index(slot)] = new_slot
+        self._restarts[name] += 1
+        return new_slot
+
+    def _take_idle(self, slot: MCPSession) -> bool:
+        """Take a session out of its idle queue, False if it is borrowed."""
+        queue = self._idle[slot.server_name]
+        # No await in between, so borrowers can't interleave
+        idle = []
+        while not queue.empty():
+            idle.append(queue.get_nowait())
+        for other in idle:
+            if other is not slot:
+                queue.put_nowait(other)
+        return any(other is slot for other in idle)
+
+    async def _check(self, slot: MCPSession) -> None:
+        # Pinged in place, so borrowers aren't kept waiting meanwhile
+        if await slot.ping(self._acquire_timeout):
+            return
+        # A borrowed session is restarted by `acquire` if it is dead
+        if not self._take_idle(slot):
+            return
+        try:
+            slot = await self._restart(slot)
+        finally:
+            self._idle[slot.server_name].put_nowait(slot)
+
+    async def _health_check(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            for slots in list(self._slots.values()):
+                for slot in list(slots):
+                    try:
+                        await self._check(slot)
+                    except Exception as e:
+                        logger.error(
+                            f"Could not restart MCP server '{slot.server_name}': {e}"
+                        )
+
+    async def get_tools(self, server_names: Iterable[str]) -> List[BaseTool]:
+        """
+        Get session-independent tools of the given servers.
+
+        Args:
+            server_names: names of the servers, as defined in config/mcp/config.json
+
+        Returns:
+            Tools that can be called while the servers' sessions are borrowed
+        """
+        await self.start()
+
+        tools: List[BaseTool] = []
+        for name in sorted(set(server_names)):
+            if name in self._inproc_tools:
+                tools.extend(self._inproc_tools[name])
+                continue
+            if name not in self._proxy_tools:
+                # No session has come up yet, borrowing one will (re)start it
+                async with self.acquire([name]):
+                    pass
+            tools.extend(self._proxy_tools[name])
+        return tools
+
+    @asynccontextmanager
+    async def acquire(self, server_names: Iterable[str]) -> AsyncIterator[List[BaseTool]]:
+        """
+        Borrow one session per server and yield their tools.
+
+        While the context is open, tools returned by `get_tools` are routed
+        to the borrowed sessions.
+
+        Args:
+            server_names: names of the servers, as defined in config/mcp/config.json
+
+        Yields:
+            The tools of the borrowed sessions
+        """
+        await self.start()
+
+        leased: List[MCPSession] = []
+        previous = _leased_tools.get()
+        try:
+            # Always borrow in the same order so concurrent requests can't deadlock
+            tools: List[BaseTool] = []
+            for name in sorted(set(server_names)):
+                if name in self._inproc_tools:
+                    tools.extend(self._inproc_tools[name])
+                    continue
+                if name not in self._idle:
+                    raise KeyError(f"MCP server '{name}' is not configured")
+                slot = await asyncio.wait_for(
+                    self._idle[name].get(), self._acquire_timeout
+                )
+                leased.append(slot)
+                if not slot.alive:
+                    leased[-1] = await self._restart(slot)
+
+            tools += [tool for slot in leased for tool in slot.tools]
+            _leased_tools.set({**(previous or {}), **{tool.name: tool for tool in tools}})
+            yield tools
+        finally:
+            # Not a token reset: streaming responses may close us from another context
+            _leased_tools.set(previous)
+            for slot in leased:
+                self._idle[slot.server_name].put_nowait(slot)
+
+    def stats(self) -> dict:
+        """Return per-server session counts."""
+        stats = {
+            name: {"transport": "inproc", "tools": len(tools)}
+            for name, tools in self._inproc_tools.items()
+        }
+        stats.update({
+            name: {
+                "size": len(slots),
+                "idle": self._idle[name].qsize(),
+                "in_use": len(slots) - self._idle[name].qsize(),
+                "alive": sum(1 for slot in slots if slot.alive),
+                "restarts": self._restarts[name],
+            }
+            for name, slots in self._slots.items()
+        })
+        return stats
+
+
+mcp_pool = MCPSessionPool()
@@ -0,0 +1,255 @@
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import UUID, uuid4
+
+from fastapi import UploadFile
+
+from app.config.app import config
+
+
+class UploadError(Exception):
+    """An upload the client has to fix, with the HTTP status to answer."""
+
+    def __init__(self, message: str, status_code: int = 400, **details: Any):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Keep only the last component of a client-sent file name."""
+    name = Path(filename or "").name
+    if name in ("", ".", ".."):
+        raise UploadError(f"Invalid file name: {filename!r}")
+    return name
+
+
+async def write_stream(
+    chunks: AsyncIterator[bytes],
+    path: Path,
+    *,
+    append: bool = False,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Write a stream of chunks to a file without blocking the event loop.
+
+    Args:
+        chunks: the content to write
+        path: the file to write
+        append: add to the end of the file instead of replacing it
+        limit: maximum number of bytes to write, the stream is rejected
+            before a chunk goes over it
+
+    Returns:
+        The number of bytes written
+    """
+    written = 0
+    f = await asyncio.to_thread(open, path, "ab" if append else "wb")
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if limit is not None and written + len(chunk) > limit:
+                raise UploadError(
+                    f"Upload is larger than {limit} bytes", status_code=413
+                )
+            await asyncio.to_thread(f.write, chunk)
+            written += len(chunk)
+        await asyncio.to_thread(f.flush)
+    finally:
+        await asyncio.to_thread(f.close)
+    return written
+
+
+async def _read_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    chunk_size = config.get("ingestion.chunk_size")
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def save_upload_file(file: UploadFile, upload_dir: Path) -> Path:
+    """Stream an uploaded file into a directory, enforcing the max file size."""
+    path = upload_dir / safe_filename(file.filename)
+    await asyncio.to_thread(upload_dir.mkdir, parents=True, exist_ok=True)
+    await write_stream(
+        _read_chunks(file), path, limit=config.get("ingestion.max_file_size")
+    )
+    return path
+
+
+class ResumableUploads:
+    """Uploads sent in chunks over several requests.
+
+    Each upload is a directory of the shared upload dir with the partial file
+    and a JSON sidecar describing it. The partial file is the source of
+    truth for the offset, so an upload survives dropped connections and API
+    restarts: the client asks for the offset and sends the rest from there.
+    """
+
+    _PART = "upload.part"
+    _INFO = "upload.json"
+    _LOCK = "upload.lock"
+
+    @property
+    def root(self) -> Path:
+        return Path(config.get("ingestion.upload_dir"), "resumable")
+
+    def _dir(self, upload_id: UUID) -> Path:
+        return self.root / str(upload_id)
+
+    def _read_info(self, upload_id: UUID) -> Dict[str, Any]:
+        upload_dir = self._dir(upload_id)
+        try:
+            info = json.loads((upload_dir / self._INFO).read_text())
+        except FileNotFoundError:
+            raise UploadError("Upload not found", status_code=404)
+        part = upload_dir / self._PART
+        info["offset"] = part.stat().st_size if part.exists() else 0
+        return info
+
+    def _create(self, info: Dict[str, Any]) -> None:
+        upload_dir = self._dir(info["id"])
+        upload_dir.mkdir(parents=True)
+        (upload_dir / self._PART).touch()
+        (upload_dir / self._INFO).write_text(json.dumps(info))
+
+    async def create(
+        self, *, filename: str, size: int, metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Start a resumable upload.
+
+        Args:
+            filename: name of the uploaded file
+            size: total size of the file in bytes
+            metadata: metadata to index the file with
+
+        Returns:
+            The upload description, with its id and current offset
+        """
+        max_size = config.get("ingestion.max_file_size")
+        if size <= 0:
+            raise UploadError("Upload size must be positive")
+        if size > max_size:
+            raise UploadError(
+                f"Upload is larger than {max_size} bytes", status_code=413
+            )
+        info = {
+            "id": str(uuid4()),
+            "filename": safe_filename(filename),
+            "size": size,
+            "metadata": metadata,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        await asyncio.to_thread(self._create, info)
+        return {**info, "offset": 0}
+
+    @asynccontextmanager
+    async def _locked(self, upload_id: UUID) -> AsyncIterator[None]:
+        """
+        Hold the lock of an upload while writing it.
+
+        An flock on a file of the upload, so requests served by different
+        API processes don't interleave their writes. A request finding the
+        upload locked gets a 409 rather than waiting on a thread.
+        """
+        path = self._dir(upload_id) / self._LOCK
+        try:
+            fd = await asyncio.to_thread(os.open, path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            raise UploadError("Upload not found", status_code=404)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError(
+                    "Upload is being written by another request", status_code=409
+                )
+            yield
+        finally:
+            # Closing the file releases the lock
+            os.close(fd)
+
+    async def get(self, upload_id: UUID) -> Dict[str, Any]:
+        """Get an upload description with the number of bytes received so far."""
+        return await asyncio.to_thread(self._read_info, upload_id)
+
+    async def append(
+        self, upload_id: UUID, *, offset: int, chunks: AsyncIterator[bytes]
+    ) -> Dict[str, Any]:
+        """
+        Add a chunk at the end of an upload.
+
+        Args:
+            upload_id: the upload to add to
+            offset: where the chunk starts, it must be the current offset
+            chunks: the chunk content
+
+        Returns:
+            The upload description with the new offset
+        """
+        async with self._locked(upload_id):
+            info = await self.get(upload_id)
+            if offset != info["offset"]:
+                raise UploadError(
+                    "Offset does not match the received bytes",
+                    status_code=409,
+                    offset=info["offset"],
+                )
+            try:
+                await write_stream(
+                    chunks,
+                    self._dir(upload_id) / self._PART,
+                    append=True,
+                    limit=info["size"] - offset,
+                )
+            finally:
+                # Whatever reached the disk counts, the client resumes from there
+                info = await self.get(upload_id)
+        return info
+
+    async def complete(self, upload_id: UUID, destination: Path) -> Dict[str, Any]:
+        """
+        Move a fully received upload to a directory.
+
+        Args:
+            upload_id: the upload to complete
+            destination: directory the file is moved to, under its upload name
+
+        Returns:
+            The upload description
+        """
+        async with self._locked(upload_id):
+            info = await self.get(upload_id)
+            if info["offset"] != info["size"]:
+                raise UploadError(
+                    "Upload is not complete",
+                    status_code=409,
+                    offset=info["offset"],
+                )
+            await asyncio.to_thread(destination.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(
+                shutil.move,
+                self._dir(upload_id) / self._PART,
+                destination / info["filename"],
+            )
+            await self.delete(upload_id)
+        return info
+
+    async def delete(self, upload_id: UUID) -> None:
+        """Drop an upload and everything received for it, unless it is being written."""
+        async with self._locked(upload_id):
+            await asyncio.to_thread(
+                shutil.rmtree, self._dir(upload_id), ignore_errors=True
+            )
+
+
+resumable_uploads = ResumableUploads()
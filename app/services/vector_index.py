@@ -0,0 +1,329 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config.app import config
+from app.db.base import init_db
+from app.models.file_chunk import FileChunk
+
+logger = logging.getLogger(__name__)
+
+TABLE = "data_embeddings"
+METHODS = ("hnsw", "ivfflat")
+# What is indexed, see `llamaindex.quantization.index`
+QUANTIZATIONS = ("vector", "halfvec", "bit")
+
+
+def index_name(method: str, quantization: str = "vector") -> str:
+    """Default name of the vector index of a method on the chunk table."""
+    column = {"vector": "embedding", "halfvec": "embedding_half", "bit": "embedding_bit"}[
+        quantization
+    ]
+    return f"ix_{TABLE}_{column}_{method}"
+
+
+def index_expression(quantization: str = "vector", ops: Optional[str] = None) -> str:
+    """
+    Indexed expression and operator class, for full vectors, half-precision
+    vectors or binary quantized vectors.
+
+    Args:
+        quantization: vector, halfvec or bit
+        ops: operator class, defaults to `llamaindex.hnsw.dist_method`
+            (its halfvec variant for halfvec, bit_hamming_ops for bit)
+    """
+    dist_method = config.get("llamaindex.hnsw.dist_method")
+    if quantization == "vector":
+        return f"embedding {ops or dist_method}"
+    if quantization == "halfvec":
+        return f"embedding_half {ops or dist_method.replace('vector_', 'halfvec_')}"
+    if quantization == "bit":
+        # Must match the query expression, see FileChunkRepository._nearest
+        dimension = FileChunk.embedding.type.dim
+        return f"(binary_quantize(embedding)::bit({dimension})) {ops or 'bit_hamming_ops'}"
+    raise ValueError(f"Unknown quantization {quantization}, use one of {QUANTIZATIONS}")
+
+
+def index_options(
+    method: str,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    lists: Optional[int] = None,
+) -> Dict[str, int]:
+    """Storage parameters of a vector index, defaults from `llamaindex.hnsw` / `llamaindex.ivfflat`."""
+    if method == "hnsw":
+        return {
+            "m": m or config.get("llamaindex.hnsw.m"),
+            "ef_construction": ef_construction or config.get("llamaindex.hnsw.ef_construction"),
+        }
+    if method == "ivfflat":
+        return {"lists": lists or config.get("llamaindex.ivfflat.lists")}
+    raise ValueError(f"Unknown vector index method {method}, use one of {METHODS}")
+
+
+def _child_name(table: str, parent_oid: int) -> str:
+    # Partition names are up to 51 characters and names are limited to 63.
+    # The oid tells apart the partition indexes of a rebuild, and stays the
+    # same when an interrupted build is resumed.
+    return f"{table}_{parent_oid}"
+
+
+class VectorIndexManager:
+    """Build, inspect and prewarm the vector indexes of the chunk table.
+
+    `CREATE INDEX CONCURRENTLY` is not supported on partitioned tables, so
+    indexes are built the way Postgres documents for them: an invalid index
+    is created on the parent tables only, every leaf partition is indexed
+    concurrently and attached, and the parent index becomes valid once all
+    its partitions are attached. Partitions created later get the index
+    from their parent. Writes are never blocked during a build.
+
+    Statements run in autocommit mode, since concurrent builds can't run
+    inside a transaction.
+    """
+
+    async def _connect(self) -> AsyncConnection:
+        engine = await init_db()
+        connection = await engine.connect()
+        return await connection.execution_options(isolation_level="AUTOCOMMIT")
+
+    async def _partitions(self, connection: AsyncConnection) -> List[Any]:
+        result = await connection.execute(
+            text(
+                """
+                SELECT relid::regclass::text AS name,
+                       parentrelid::regclass::text AS parent,
+                       isleaf AS is_leaf,
+                       level
+                FROM pg_partition_tree(CAST(:table AS regclass))
+                WHERE level > 0
+                ORDER BY level, relid::regclass::text
+                """
+            ),
+            {"table": TABLE},
+        )
+        return result.all()
+
+    async def _index_valid(self, connection: AsyncConnection, name: str) -> Optional[bool]:
+        """Whether an index is valid, None if it doesn't exist."""
+        result = await connection.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name},
+        )
+        return result.scalar()
+
+    async def build(
+        self,
+        method: str = "hnsw",
+        name: Optional[str] = None,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        lists: Optional[int] = None,
+        ops: Optional[str] = None,
+        quantization: str = "vector",
+        replace: bool = False,
+        maintenance_work_mem: Optional[str] = None,
+        progress: Optional[Callable[[int, int, str], None]] = None,
+    ) -> str:
+        """
+        Build a vector index without blocking writes.
+
+        Args:
+            method: hnsw or ivfflat
+            name: name of the index, defaults to `ix_data_embeddings_<column>_<method>`
+            m: HNSW connections per node, defaults to `llamaindex.hnsw.m`
+            ef_construction: HNSW build candidate list, defaults to `llamaindex.hnsw.ef_construction`
+            lists: IVFFlat lists, defaults to `llamaindex.ivfflat.lists`
+            ops: operator class, see `index_expression`
+            quantization: index the full vectors, the half-precision
+                column (vector, halfvec) or the binary quantized vectors (bit)
+            replace: rebuild an existing index of that name, swapping it
+                once the new one is complete
+            maintenance_work_mem: memory for the build, HNSW builds are much
+                faster when the graph fits in it
+            progress: called with (done, total, partition) before each partition
+
+        Returns:
+            The name of the index
+        """
+        name = name or index_name(method, quantization)
+        options = index_options(method, m=m, ef_construction=ef_construction, lists=lists)
+        expression = index_expression(quantization, ops)
+        with_options = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+        using = f"USING {method} ({expression}) WITH ({with_options})"
+
+        connection = await self._connect()
+        try:
+            if maintenance_work_mem:
+                await connection.execute(
+                    text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                    {"value": maintenance_work_mem},
+                )
+            # An invalid index is left by an interrupted build, resume it
+            exists = await self._index_valid(connection, name) is True
+            if exists and not replace:
+                raise ValueError(f"Index {name} already exists, use replace to rebuild it")
+            build_name = f"{name}_new" if exists else name
+
+            # Invalid until all partitions are attached
+            await connection.execute(
+                text(f'CREATE INDEX IF NOT EXISTS "{build_name}" ON ONLY {TABLE} {using}')
+            )
+            result = await connection.execute(
+                text("SELECT CAST(to_regclass(:name) AS oid)"), {"name": build_name}
+            )
+            parent_oid = result.scalar()
+            parent_indexes = {TABLE: build_name}
+            partitions = await self._partitions(connection)
+            leaves = [partition for partition in partitions if partition.is_leaf]
+            done = 0
+            for partition in partitions:
+                child = _child_name(partition.name, parent_oid)
+                parent_indexes[partition.name] = child
+                if partition.is_leaf:
+                    if progress:
+                        progress(done, len(leaves), partition.name)
+                    done += 1
+                    valid = await self._index_valid(connection, child)
+                    if valid is False:
+                        # Left by a failed concurrent build
+                        await connection.execute(text(f'DROP INDEX CONCURRENTLY "{child}"'))
+                    if not valid:
+                        await connection.execute(
+                            text(
+                                f'CREATE INDEX CONCURRENTLY "{child}" ON {partition.name} {using}'
+                            )
+                        )
+                else:
+                    await connection.execute(
+                        text(f'CREATE INDEX IF NOT EXISTS "{child}" ON ONLY {partition.name} {using}')
+                    )
+                await self._attach(connection, parent_indexes[partition.parent], child)
+            if progress:
+                progress(done, len(leaves), "")
+
+            if exists:
+                # Dropping a partitioned index can't be done concurrently,
+                # this only takes a short lock
+                await connection.execute(text(f'DROP INDEX "{name}"'))
+                await connection.execute(text(f'ALTER INDEX "{build_name}" RENAME TO "{name}"'))
+            return name
+        finally:
+            await connection.close()
+
+    async def _attach(self, connection: AsyncConnection, parent: str, child: str) -> None:
+        result = await connection.execute(
+            text(
+                """
+                SELECT 1 FROM pg_inherits
+                WHERE inhrelid = CAST(:child AS regclass)
+                  AND inhparent = CAST(:parent AS regclass)
+                """
+            ),
+            {"child": child, "parent": parent},
+        )
+        if result.first() is None:
+            await connection.execute(text(f'ALTER INDEX "{parent}" ATTACH PARTITION "{child}"'))
+
+    async def drop(self, name: str) -> None:
+        """Drop a vector index and the indexes of its partitions."""
+        connection = await self._connect()
+        try:
+            await connection.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+        finally:
+            await connection.close()
+
+    async def list_indexes(self) -> List[Dict[str, Any]]:
+        """
+        Get the vector indexes of the chunk table.
+
+        Returns:
+            The name, definition, validity, number of partition indexes and
+            total size in bytes of each index
+        """
+        connection = await self._connect()
+        try:
+            result = await connection.execute(
+                text(
+                    """
+                    SELECT i.indexrelid::regclass::text AS name,
+                           pg_get_indexdef(i.indexrelid) AS definition,
+                           i.indisvalid AS valid,
+                           (SELECT count(*) FROM pg_partition_tree(i.indexrelid)
+                            WHERE isleaf AND level > 0) AS partitions,
+                           (SELECT coalesce(sum(pg_relation_size(relid)), 0)
+                            FROM pg_partition_tree(i.indexrelid)) AS size
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE i.indrelid = CAST(:table AS regclass)
+                      AND am.amname IN ('hnsw', 'ivfflat')
+                    ORDER BY 1
+                    """
+                ),
+                {"table": TABLE},
+            )
+            return [dict(row._mapping) for row in result]
+        finally:
+            await connection.close()
+
+    async def progress(self) -> List[Dict[str, Any]]:
+        """
+        Get the index builds in progress on the chunk table partitions.
+
+        Returns:
+            The partition, index, phase and blocks/tuples done of each build
+        """
+        connection = await self._connect()
+        try:
+            result = await connection.execute(
+                text(
+                    """
+                    SELECT p.relid::regclass::text AS partition,
+                           p.index_relid::regclass::text AS index,
+                           p.phase,
+                           p.blocks_done, p.blocks_total,
+                           p.tuples_done, p.tuples_total
+                    FROM pg_stat_progress_create_index p
+                    WHERE p.relid IN (
+                        SELECT relid FROM pg_partition_tree(CAST(:table AS regclass))
+                    )
+                    ORDER BY 1
+                    """
+                ),
+                {"table": TABLE},
+            )
+            return [dict(row._mapping) for row in result]
+        finally:
+            await connection.close()
+
+    async def prewarm(self, name: str) -> int:
+        """
+        Load a vector index into shared buffers, e.g. after a restart.
+
+        Needs the pg_prewarm extension, created here if missing.
+
+        Args:
+            name: the index to load, with all its partition indexes
+
+        Returns:
+            The number of blocks loaded
+        """
+        connection = await self._connect()
+        try:
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_prewarm"))
+            result = await connection.execute(
+                text(
+                    """
+                    SELECT coalesce(sum(pg_prewarm(relid)), 0)
+                    FROM pg_partition_tree(CAST(:name AS regclass))
+                    WHERE isleaf
+                    """
+                ),
+                {"name": name},
+            )
+            return int(result.scalar())
+        finally:
+            await connection.close()
@@ -1,19 +1,115 @@
+from typing import Any, Dict, List, Optional
+
 from app.config.llamaindex import init_settings
+from app.core.llamaindex.rerank import mmr_rerank
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.async_utils import asyncio_run
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.settings import Settings
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
 from llama_index.vector_stores.postgres import PGVectorStore
-from sqlalchemy import make_url
+from pydantic import BaseModel
+from sqlalchemy import Row, make_url
 
 from app.config.app import config
 from app.db.base import get_database_url
+from app.repositories.file_chunk import FileChunkRepository
+from app.services.embedding_cache import query_embedding_cache
+
+
+class SearchSettings(BaseModel):
+    """Retrieval settings, defaults from `llamaindex.hybrid` and `llamaindex.mmr`
+    overridable per tenant."""
+
+    hybrid: bool
+    vector_weight: float
+    text_weight: float
+    rrf_k: int
+    candidates: int
+    mmr: bool
+    mmr_lambda: float
+    fetch_factor: int
+    group_by: Optional[str]
+    # HNSW candidate list, None for `llamaindex.hnsw.ef_search`
+    ef_search: Optional[int] = None
+
+    @classmethod
+    def for_tenant(cls, overrides: Optional[Dict[str, Any]] = None) -> "SearchSettings":
+        """
+        Get the settings of a tenant.
+
+        Args:
+            overrides: the "search" key of the tenant's user config, e.g.
+                {"hybrid": true, "vector_weight": 0.7, "mmr": true, "ef_search": 100}
+        """
+        defaults = {
+            "hybrid": config.get("llamaindex.hybrid.enabled"),
+            "vector_weight": config.get("llamaindex.hybrid.vector_weight"),
+            "text_weight": config.get("llamaindex.hybrid.text_weight"),
+            "rrf_k": config.get("llamaindex.hybrid.rrf_k"),
+            "candidates": config.get("llamaindex.hybrid.candidates"),
+            "mmr": config.get("llamaindex.mmr.enabled"),
+            "mmr_lambda": config.get("llamaindex.mmr.lambda_mult"),
+            "fetch_factor": config.get("llamaindex.mmr.fetch_factor"),
+            "group_by": config.get("llamaindex.mmr.group_by") or None,
+        }
+        return cls(**{**defaults, **(overrides or {})})
+
+
+class ChunkRetriever(BaseRetriever):
+    """Retriever over the partitioned chunk table, see `VectorStoreService.aretrieve`."""
+
+    def __init__(
+        self,
+        service: "VectorStoreService",
+        top_k: int = 5,
+        metadata: Optional[dict] = None,
+        min_score: Optional[float] = None,
+        settings: Optional[SearchSettings] = None,
+    ):
+        self._service = service
+        self._top_k = top_k
+        self._metadata = metadata
+        self._min_score = min_score
+        self._settings = settings
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return asyncio_run(self._aretrieve(query_bundle))
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return await self._service.aretrieve(
+            query_bundle.query_str,
+            top_k=self._top_k,
+            metadata=self._metadata,
+            min_score=self._min_score,
+            settings=self._settings,
+        )
 
 
 class VectorStoreService:
-    """Service for managing vector store operations."""
+    """Service for managing vector store operations.
+
+    Holds the embedding model, the PGVectorStore (and its SQLAlchemy
+    engines) and the index for the lifetime of the process. Use
+    `get_vector_store_service` instead of creating instances per request.
+
+    Retrieval goes through `FileChunkRepository.search` rather than the
+    PGVectorStore queries, which don't know about the tenant and event
+    partitions of the chunk table.
+    """
 
     def __init__(self):
         init_settings()
+        self.embed_model = Settings.embed_model
         self.vector_store = self._create_vector_store()
+        self.index = VectorStoreIndex.from_vector_store(
+            vector_store=self.vector_store, embed_model=self.embed_model
+        )
 
     def _create_vector_store(self) -> PGVectorStore:
         """Create a PostgreSQL vector store."""
@@ -25,15 +121,139 @@ class VectorStoreService:
             port=str(url.port) if url.port else None,
             user=url.username,
             table_name=config.get("llamaindex.data_table"),
-            embed_dim=768,  # TODO: Make this configurable
+            embed_dim=config.get("llamaindex.embedding.dimension"),
             hnsw_kwargs={
-                "hnsw_m": 16,
-                "hnsw_ef_construction": 64,
-                "hnsw_ef_search": 40,
-                "hnsw_dist_method": "vector_cosine_ops",
+                "hnsw_m": config.get("llamaindex.hnsw.m"),
+                "hnsw_ef_construction": config.get("llamaindex.hnsw.ef_construction"),
+                "hnsw_ef_search": config.get("llamaindex.hnsw.ef_search"),
+                "hnsw_dist_method": config.get("llamaindex.hnsw.dist_method"),
             },
+            use_jsonb=True,
+            # The partitioned table and its indexes are managed by migrations
+            perform_setup=False,
         )
 
     def get_index(self) -> VectorStoreIndex:
         """Get the vector store index."""
-        return VectorStoreIndex.from_vector_store(vector_store=self.vector_store)
+        return self.index
+
+    def get_retriever(
+        self,
+        top_k: int = 5,
+        metadata: Optional[dict] = None,
+        settings: Optional[SearchSettings] = None,
+    ) -> BaseRetriever:
+        """
+        Get a retriever over the chunk table.
+
+        Args:
+            top_k: number of nodes to retrieve
+            metadata: metadata key-value pairs the nodes must match
+            settings: retrieval settings of the tenant
+
+        Returns:
+            A retriever borrowing the shared embedding model
+        """
+        return ChunkRetriever(self, top_k=top_k, metadata=metadata, settings=settings)
+
+    def get_query_engine(
+        self,
+        top_k: int = 5,
+        metadata: Optional[dict] = None,
+        settings: Optional[SearchSettings] = None,
+    ) -> BaseQueryEngine:
+        """Get a query engine that synthesizes an answer with the LLM."""
+        return RetrieverQueryEngine.from_args(
+            self.get_retriever(top_k=top_k, metadata=metadata, settings=settings)
+        )
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        metadata: Optional[dict] = None,
+        min_score: Optional[float] = None,
+        settings: Optional[SearchSettings] = None,
+    ) -> List[NodeWithScore]:
+        """
+        Retrieve the nodes most relevant to the query, without LLM synthesis.
+
+        With hybrid search, vector and full-text rankings are fused in a
+        single query and scores are fusion scores rather than similarities.
+        With MMR, `fetch_factor` times more nodes are fetched, collapsed to
+        one per `group_by` value and re-ranked for diversity, so fewer than
+        top_k nodes may be returned.
+
+        Args:
+            query: the text to search for
+            top_k: number of nodes to retrieve
+            metadata: metadata key-value pairs the nodes must match
+            min_score: drop nodes with a similarity score below this value;
+                with hybrid search, only applies to the vector ranking
+            settings: retrieval settings of the tenant, defaults to the app config
+
+        Returns:
+            The retrieved nodes, most relevant first
+        """
+        settings = settings or SearchSettings.for_tenant()
+        embedding = await query_embedding_cache.aget_query_embedding(
+            query, self.embed_model
+        )
+        fetch_k = top_k * max(1, settings.fetch_factor) if settings.mmr else top_k
+        repository = FileChunkRepository()
+        if settings.hybrid:
+            rows = await repository.hybrid_search(
+                embedding,
+                query,
+                top_k=fetch_k,
+                metadata=metadata,
+                min_score=min_score,
+                vector_weight=settings.vector_weight,
+                text_weight=settings.text_weight,
+                rrf_k=settings.rrf_k,
+                candidates=max(settings.candidates, fetch_k),
+                ef_search=settings.ef_search,
+                with_embeddings=settings.mmr,
+            )
+        else:
+            rows = await repository.search(
+                embedding,
+                top_k=fetch_k,
+                metadata=metadata,
+                min_score=min_score,
+                ef_search=settings.ef_search,
+                with_embeddings=settings.mmr,
+            )
+        nodes = [NodeWithScore(node=self._to_node(row), score=row.score) for row in rows]
+        if settings.mmr:
+            nodes = mmr_rerank(
+                embedding,
+                nodes,
+                [row.embedding for row in rows],
+                top_k=top_k,
+                lambda_mult=settings.mmr_lambda,
+                group_by=settings.group_by,
+            )
+        return nodes
+
+    @staticmethod
+    def _to_node(row: Row) -> TextNode:
+        """Rebuild a node from its row, the same way PGVectorStore does."""
+        try:
+            node = metadata_dict_to_node(row.metadata_)
+            node.set_content(str(row.text))
+        except Exception:
+            # Rows written without the node info in their metadata
+            node = TextNode(id_=row.node_id, text=row.text, metadata=row.metadata_ or {})
+        return node
+
+
+_vector_store_service: Optional[VectorStoreService] = None
+
+
+def get_vector_store_service() -> VectorStoreService:
+    """Get the process-wide vector store service, creating it on first use."""
+    global _vector_store_service
+    if _vector_store_service is None:
+        _vector_store_service = VectorStoreService()
+    return _vector_store_service